@@ -1,19 +1,112 @@
+import inspect
+import threading
 import cv2
+import numpy as np
 import mediapipe as mp
 
 
+NUM_LANDMARKS = 21
+
+# Кончики и PIP-суставы указательного, среднего, безымянного и мизинца
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+# Вес пальца в битовой маске (указательный — старший бит)
+FINGER_BITS = np.array([8, 4, 2, 1])
+
+# Жест по маске четырёх пальцев (без большого), см. recognize_gesture
+GESTURE_BY_MASK = {
+    0b1000: "neutral",
+    0b0000: "rock",
+    0b1100: "scissors",
+    0b1111: "paper",
+}
+# Та же таблица для всех 16 масок — классификация всех рук одной индексацией
+GESTURE_LUT = np.array([GESTURE_BY_MASK.get(m, "unknown") for m in range(16)], dtype=object)
+
+# Приоритет при выборе отвечающей руки из нескольких (см. select_hand)
+GESTURE_PRIORITY = {"rock": 2, "scissors": 2, "paper": 2, "neutral": 1}
+
+# Параметры, с которыми создаётся граф MediaPipe; при их смене граф пересоздаётся.
+# Остальные параметры HandDetector меняются на лету.
+GRAPH_PARAMS = ("mode", "maxHands", "detectionCon", "trackCon")
+
+
+class OverlayRenderer:
+    """
+    Отрисовка 21 точки и связей руки пакетами OpenCV.
+
+    Все связи рисуются одним вызовом cv2.polylines по массиву отрезков
+    (N, 2, 2), точки — вторым вызовом: вырожденные отрезки толщиной
+    2·radius дают круглые «точки». Рисовать стоит на кадре уже экранного
+    размера: координаты масштабируются через scale.
+    """
+
+    def __init__(self, connections, line_color=(255, 255, 255), point_color=(0, 0, 255),
+                 thickness=2, radius=4):
+        self.connections = np.asarray(connections, np.int32).reshape(-1, 2)
+        self.line_color = line_color
+        self.point_color = point_color
+        self.thickness = thickness
+        self.radius = radius
+
+    def draw(self, img, lm_list, scale=1.0, point_color=None):
+        """lm_list — массив (21, 2+) пиксельных координат кадра, на котором он получен."""
+        if lm_list is None:
+            return img
+        pts = (lm_list[:, :2] * scale).astype(np.int32)
+        cv2.polylines(img, pts[self.connections], False, self.line_color, self.thickness)
+        dots = np.repeat(pts[:, None, :], 2, axis=1)
+        cv2.polylines(img, dots, False, point_color or self.point_color, 2 * self.radius)
+        return img
+
+
 class HandDetector:
     def __init__(self,
                  mode=False,
                  maxHands=1,
                  detectionCon=0.7,
-                 trackCon=0.7):
+                 trackCon=0.7,
+                 roi=False,
+                 roiPadding=0.35,
+                 roiMinSize=160,
+                 roiConfirmFrames=2,
+                 inferenceWidth=None,
+                 responseHand=None,
+                 classifier=None):
 
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
 
+        # ROI-режим: после уверенного обнаружения MediaPipe получает только
+        # область вокруг руки, а не весь кадр
+        self.roi = roi
+        self.roiPadding = roiPadding
+        self.roiMinSize = roiMinSize
+        # Уверенность обнаружения: в ROI переходим, только когда рука найдена
+        # по всему кадру столько кадров подряд. В режиме видео MediaPipe отдаёт
+        # точки на следующем кадре, лишь пока оценка присутствия руки не ниже
+        # trackCon, иначе рука теряется — серия кадров с точками и есть
+        # подтверждённое слежение (score из multi_handedness — вероятность
+        # левой/правой руки, а не уверенность обнаружения)
+        self.roiConfirmFrames = roiConfirmFrames
+        self.roi_box = None          # (x0, y0, x1, y1) в пикселях полного кадра
+        self._roiStreak = 0          # кадров подряд с рукой при поиске по всему кадру
+
+        # Ширина кадра для MediaPipe: более широкие кадры/ROI уменьшаются.
+        # Точки нормированы, поэтому масштаб не влияет на координаты результата.
+        self.inferenceWidth = inferenceWidth
+
+        # Какой рукой отвечает пользователь: "Left", "Right" или None — любой.
+        # Метки MediaPipe рассчитаны на зеркальный кадр (как у фронтальной камеры).
+        self.responseHand = responseHand
+
+        # Способ классификации жеста: None — правила по пальцам (GESTURE_BY_MASK),
+        # иначе объект с predict(lmNorm, thumbSign) → список жестов,
+        # например gesture_classifier.GestureClassifier
+        self.classifier = classifier
+
         self.mpHands = mp.solutions.hands
         self.hands = self.mpHands.Hands(
             static_image_mode=self.mode,
@@ -22,64 +115,268 @@ class HandDetector:
             min_tracking_confidence=self.trackCon
         )
 
-        self.mpDraw = mp.solutions.drawing_utils
         self.results = None
-        self.lmList = []
+
+        # Точки всех рук в заранее выделенных массивах (maxHands, 21, 3) float32,
+        # которые переиспользуются от кадра к кадру:
+        #   lmNormAll — нормированные (x, y, z) из MediaPipe
+        #   lmAll     — пиксельные (x, y, z·ширина) в координатах кадра
+        # lmNorm и lmList — срезы этих массивов для выбранной руки.
+        self.lmNormAll = np.zeros((maxHands, NUM_LANDMARKS, 3), np.float32)
+        self.lmAll = np.zeros((maxHands, NUM_LANDMARKS, 3), np.float32)
+        self.fingersAll = np.zeros((maxHands, 5), np.uint8)
+        self._fingersFresh = False
+        self.thumbSign = np.zeros(maxHands, np.float32)
+        self.lmNorm = self.lmNormAll[0]
+        self.lmList = self.lmAll[0]
+        self.numHands = 0
+        self.handedness = []         # "Left"/"Right" для каждой найденной руки
+        self.gestures = []           # жест каждой найденной руки
+        self.handIndex = 0           # номер выбранной (отвечающей) руки
+        self.hasHand = False
+        self.overlay = OverlayRenderer(sorted(self.mpHands.HAND_CONNECTIONS))
+
+    def graph_key(self):
+        return tuple(getattr(self, name) for name in GRAPH_PARAMS)
+
+    def warm_up(self, size=(640, 480)):
+        """
+        Прогоняет пустой кадр: MediaPipe загружает модели и выделяет буферы
+        заранее, а не на первых кадрах тренировки.
+        """
+        w, h = size
+        self.find_hands(np.zeros((h, w, 3), np.uint8), draw=False)
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает состояние слежения между сессиями. Граф MediaPipe не пересоздаётся."""
+        self.roi_box = None
+        self._roiStreak = 0
+        self.results = None
+        self.numHands = 0
+        self.handedness = []
+        self.gestures = []
+        self.handIndex = 0
+        self.hasHand = False
+
+    def close(self):
+        self.hands.close()
 
     def find_hands(self, img, draw=True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
+        h, w = img.shape[:2]
+        box = self.roi_box if self.roi else None
+
+        if box:
+            x0, y0, x1, y1 = box
+            imgRGB = self._prepare(img[y0:y1, x0:x1])
+            self.results = self.hands.process(imgRGB)
+            if self.results.multi_hand_landmarks:
+                self._map_from_roi(box, w, h)
+            else:
+                # Рука ушла из области — тут же ищем по всему кадру
+                self.roi_box = None
+                box = None
+
+        if not box:
+            imgRGB = self._prepare(img)
+            self.results = self.hands.process(imgRGB)
 
-        if self.results.multi_hand_landmarks:
+        if self.roi:
+            self._update_roi(w, h)
+
+        if draw and self.results.multi_hand_landmarks:
             for handLms in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mpDraw.draw_landmarks(
-                        img,
-                        handLms,
-                        self.mpHands.HAND_CONNECTIONS
-                    )
+                pts = np.array([(lm.x * w, lm.y * h) for lm in handLms.landmark], np.float32)
+                self.overlay.draw(img, pts)
         return img
 
-    def find_position(self, img, handNo=0):
-        self.lmList = []
+    def _prepare(self, img):
+        """Уменьшает кадр до inferenceWidth (до конвертации — так дешевле) и переводит в RGB."""
+        w = img.shape[1]
+        if self.inferenceWidth and w > self.inferenceWidth:
+            h = img.shape[0]
+            size = (self.inferenceWidth, max(1, round(h * self.inferenceWidth / w)))
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
-        if self.results and self.results.multi_hand_landmarks:
-            if handNo < len(self.results.multi_hand_landmarks):
-                myHand = self.results.multi_hand_landmarks[handNo]
-                for id, lm in enumerate(myHand.landmark):
-                    h, w, c = img.shape
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    self.lmList.append([id, cx, cy])
+    def _map_from_roi(self, box, w, h):
+        """Переводит нормированные координаты точек из области ROI в координаты полного кадра."""
+        x0, y0, x1, y1 = box
+        sx, sy = (x1 - x0) / w, (y1 - y0) / h
+        ox, oy = x0 / w, y0 / h
+        for handLms in self.results.multi_hand_landmarks:
+            for lm in handLms.landmark:
+                lm.x = ox + lm.x * sx
+                lm.y = oy + lm.y * sy
+                lm.z = lm.z * sx
 
-        return self.lmList
+    def _update_roi(self, w, h):
+        """
+        Пересчитывает ROI по точкам руки. Область сдвигается, только когда рука
+        подходит к её краю или заметно меняет размер — так вход MediaPipe
+        остаётся стабильным между кадрами.
+        """
+        hands = self.results.multi_hand_landmarks if self.results else None
+        # Пока видно меньше рук, чем отслеживается, ищем по всему кадру —
+        # иначе вторая рука не попадёт в область
+        if not hands or len(hands) < self.maxHands:
+            self.roi_box = None
+            self._roiStreak = 0
+            return
 
-    def _get_fingers(self):
+        # Переходим в ROI только после подтверждённого слежения (roiConfirmFrames)
+        if self.roi_box is None:
+            self._roiStreak += 1
+            if self._roiStreak < self.roiConfirmFrames:
+                return
+            self._roiStreak = 0
+
+        xs = [lm.x for handLms in hands for lm in handLms.landmark]
+        ys = [lm.y for handLms in hands for lm in handLms.landmark]
+        hx0, hx1 = min(xs) * w, max(xs) * w
+        hy0, hy1 = min(ys) * h, max(ys) * h
+
+        if self.roi_box:
+            x0, y0, x1, y1 = self.roi_box
+            margin = 0.1 * (x1 - x0)
+            inside = (hx0 - margin > x0 and hx1 + margin < x1 and
+                      hy0 - margin > y0 and hy1 + margin < y1)
+            size = max(hx1 - hx0, hy1 - hy0)
+            if inside and size > 0.3 * (x1 - x0):
+                return
+
+        # Квадратная область вокруг руки с запасом на движение
+        side = max(hx1 - hx0, hy1 - hy0) * (1 + 2 * self.roiPadding)
+        side = int(min(max(side, self.roiMinSize), w, h))
+        cx, cy = (hx0 + hx1) / 2, (hy0 + hy1) / 2
+        x0 = int(min(max(cx - side / 2, 0), w - side))
+        y0 = int(min(max(cy - side / 2, 0), h - side))
+        self.roi_box = (x0, y0, x0 + side, y0 + side)
+
+    def reset_roi(self):
+        """Сбрасывает ROI — следующий кадр обрабатывается целиком."""
+        self.roi_box = None
+        self._roiStreak = 0
+
+    def find_position(self, img, handNo=None):
         """
-        Возвращает список [большой, указ., средний, безымян., мизинец]
-        1 = разогнут, 0 = согнут.
+        Заполняет точки всех найденных рук за один проход и классифицирует
+        их разом (_classify). Возвращает lmList руки handNo, а при handNo=None —
+        отвечающей руки (select_hand). lmList — срез массива, который
+        переиспользуется на следующем кадре (при передаче в другой поток нужна
+        копия), или None, если руки нет.
         """
-        if not self.lmList:
+        self.hasHand = False
+        self.numHands = 0
+        hands = self.results.multi_hand_landmarks if self.results else None
+        if not hands:
             return None
 
-        fingers = []
+        n = min(len(hands), self.maxHands)
+        norm = self.lmNormAll
+        # Одно преобразование в массив на все руки сразу
+        norm[:n] = [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in hands[:n]]
+        h, w = img.shape[:2]
+        np.multiply(norm[:n], (w, h, w), out=self.lmAll[:n])
 
-        # Большой палец: сравниваем по X (зеркально для правой руки)
-        if self.lmList[4][1] > self.lmList[3][1]:
-            fingers.append(1)
-        else:
-            fingers.append(0)
+        handedness = self.results.multi_handedness or []
+        self.handedness = [
+            handedness[k].classification[0].label if k < len(handedness) else None
+            for k in range(n)
+        ]
+        self.numHands = n
+        self._classify()
 
-        # Остальные 4 пальца: кончик выше PIP-сустава → разогнут
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-        for tip, pip in zip(tips, pips):
-            fingers.append(1 if self.lmList[tip][2] < self.lmList[pip][2] else 0)
+        idx = self.select_hand() if handNo is None else handNo
+        if idx is None or idx >= n:
+            return None
+        self.handIndex = idx
+        self.lmNorm = norm[idx]
+        self.lmList = self.lmAll[idx]
+        self.hasHand = True
+        return self.lmList
+
+    def _classify(self):
+        """
+        Жесты всех найденных рук — векторно, без цикла по рукам: правилами
+        по пальцам или обученным классификатором (self.classifier).
+        Сторона руки берётся из multi_handedness (неизвестная — как левая).
+        """
+        n = self.numHands
+        sign = self.thumbSign[:n]
+        sign[:] = [-1.0 if label == "Right" else 1.0 for label in self.handedness]
 
+        if self.classifier is not None:
+            # Пальцы классификатору не нужны — посчитаются, только если их спросят
+            self._fingersFresh = False
+            self.gestures = self.classifier.predict(self.lmNormAll[:n], sign)
+            return
+        fingers = self._compute_fingers()
+        self.gestures = GESTURE_LUT[fingers[:, 1:] @ FINGER_BITS].tolist()
+
+    def _compute_fingers(self):
+        """
+        Разогнутость пальцев всех найденных рук.
+
+        Большой палец разогнут, если его кончик дальше сустава IP в сторону
+        от ладони. В зеркальном кадре у правой руки это влево по X, у левой —
+        вправо.
+        """
+        n = self.numHands
+        lm = self.lmNormAll[:n]
+        sign = self.thumbSign[:n]
+        fingers = self.fingersAll[:n]
+        fingers[:, 0] = (lm[:, 4, 0] - lm[:, 3, 0]) * sign > 0
+        # Остальные 4 пальца: кончик выше PIP-сустава → разогнут
+        fingers[:, 1:] = lm[:, FINGER_TIPS, 1] < lm[:, FINGER_PIPS, 1]
+        self._fingersFresh = True
         return fingers
 
+    def select_hand(self):
+        """
+        Номер руки, которой отвечает пользователь, или None.
+
+        Рассматриваются только руки стороны responseHand (если задана).
+        Среди них предпочтение — руке с ответным жестом, затем с нейтральным;
+        при равенстве — руке ближе к камере (с большей ладонью в кадре).
+        """
+        n = self.numHands
+        if not n:
+            return None
+        lm = self.lmNormAll[:n]
+        palm = np.linalg.norm(lm[:, 9, :2] - lm[:, 0, :2], axis=1)
+        best, best_key = None, None
+        for k in range(n):
+            if self.responseHand and self.handedness[k] != self.responseHand:
+                continue
+            key = (GESTURE_PRIORITY.get(self.gestures[k], 0), palm[k])
+            if best_key is None or key > best_key:
+                best, best_key = k, key
+        return best
+
+    def draw_position(self, img, lm_list, point_color=None, scale=1.0):
+        """
+        Рисует точки и связи руки по готовому lm_list (например, полученному
+        из DetectionWorker) — без повторного прогона MediaPipe.
+        point_color задаётся в порядке каналов img (по умолчанию BGR-красный);
+        scale — во сколько раз img меньше кадра, на котором получен lm_list.
+        """
+        return self.overlay.draw(img, lm_list, scale=scale, point_color=point_color)
+
+    def _get_fingers(self):
+        """
+        Возвращает массив [большой, указ., средний, безымян., мизинец]
+        выбранной руки: 1 = разогнут, 0 = согнут.
+        """
+        if not self.hasHand:
+            return None
+        if not self._fingersFresh:
+            self._compute_fingers()
+        return self.fingersAll[self.handIndex]
+
     def recognize_gesture(self):
         """
-        Возвращает:
+        Возвращает жест выбранной руки:
           'neutral'  — ☝️ один указательный (нейтральное/базовое положение)
           'rock'     — ✊ кулак
           'scissors' — ✌️ указательный + средний
@@ -87,36 +384,55 @@ class HandDetector:
           'unknown'  — что-то непонятное
 
         Нейтральный жест (☝️) распознаётся в том числе из любого положения.
+        Большой палец на жест не влияет: состояние четырёх остальных пальцев
+        сворачивается в битовую маску и ищется в GESTURE_BY_MASK.
+        Жесты всех рук считаются в find_position, здесь — только выборка.
+        С обученным классификатором (classifier) правила выше не применяются.
         """
-        fingers = self._get_fingers()
-        if fingers is None:
+        if not self.hasHand:
             return "unknown"
+        return self.gestures[self.handIndex]
 
-        thumb, idx, mid, ring, pinky = fingers
+    def hand_side(self):
+        """Сторона выбранной руки ("Left"/"Right") или None."""
+        return self.handedness[self.handIndex] if self.hasHand else None
 
-        # Нейтральный жест: только указательный поднят (☝️)
-        # Большой палец и остальные — сжаты (не учитываем большой)
-        if idx == 1 and mid == 0 and ring == 0 and pinky == 0:
-            return "neutral"
+    def is_neutral(self):
+        """Возвращает True, если текущий жест — нейтральный (☝️)."""
+        return self.recognize_gesture() == "neutral"
 
-        # Камень (✊): все 4 пальца (без большого) сжаты
-        if idx == 0 and mid == 0 and ring == 0 and pinky == 0:
-            return "rock"
 
-        # Ножницы (✌️): указательный + средний подняты, безымянный и мизинец сжаты
-        if idx == 1 and mid == 1 and ring == 0 and pinky == 0:
-            return "scissors"
+# ─── Общий детектор приложения ───────────────────────────────────────
+_shared = None
+_shared_lock = threading.Lock()
 
-        # Бумага (🖐️): все 4 пальца (без большого) подняты
-        if idx == 1 and mid == 1 and ring == 1 and pinky == 1:
-            return "paper"
 
-        # Доп. распознавание: бумага с большим пальцем (все 5)
-        if thumb == 1 and idx == 1 and mid == 1 and ring == 1 and pinky == 1:
-            return "paper"
+def shared_detector(warm_up=False, warm_up_size=(640, 480), **params):
+    """
+    Возвращает долгоживущий HandDetector с параметрами params (как у HandDetector).
 
-        return "unknown"
+    Граф MediaPipe создаётся один раз и переиспользуется между сессиями;
+    пересоздаётся он только при смене GRAPH_PARAMS, остальные параметры
+    (roi, inferenceWidth, ...) просто переустанавливаются, а состояние
+    слежения сбрасывается. warm_up=True прогоняет пустой кадр — для вызова
+    из фонового потока при старте приложения. Вызовы сериализуются: пока
+    идёт прогрев, запрос детектора ждёт его окончания, а не строит второй граф.
+    """
+    global _shared
+    bound = inspect.signature(HandDetector).bind(**params)
+    bound.apply_defaults()
+    args = bound.arguments
 
-    def is_neutral(self):
-        """Возвращает True, если текущий жест — нейтральный (☝️)."""
-        return self.recognize_gesture() == "neutral"
+    with _shared_lock:
+        if _shared is None or _shared.graph_key() != tuple(args[name] for name in GRAPH_PARAMS):
+            if _shared is not None:
+                _shared.close()
+            _shared = HandDetector(**args)
+        else:
+            for name, value in args.items():
+                if name not in GRAPH_PARAMS:
+                    setattr(_shared, name, value)
+            _shared.reset()
+        if warm_up:
+            _shared.warm_up(warm_up_size)
+        return _shared
@@ -0,0 +1,293 @@
+"""
+Бенчмарк конвейера распознавания жестов без GUI.
+
+Прогоняет HandDetector.find_hands → find_position → recognize_gesture по
+записанным клипам (или синтетическим кадрам) для нескольких конфигураций
+детектора и пишет JSON с пропускной способностью, перцентилями задержек
+по стадиям и потреблением памяти — для сравнения между релизами.
+
+Примеры:
+    python benchmark.py --clips recordings/ --out bench.json
+    python benchmark.py --synthetic 300 --size 1280x720
+    python benchmark.py --clips recordings/ --configs my_configs.json
+
+Файл конфигураций — JSON-список объектов с полями name и params
+(аргументы HandDetector), например:
+    [{"name": "roi_320", "params": {"roi": true, "inferenceWidth": 320}}]
+В params.classifier можно указать путь к весам gesture_classifier (.npz).
+
+Сравнение способов классификации жеста (правила по пальцам против
+обученного классификатора) на точках рук из тех же клипов:
+    python benchmark.py --clips recordings/ --classifier gestures.npz
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from perf_stats import PipelineProfiler
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+
+DEFAULT_CONFIGS = [
+    {"name": "baseline",       "params": {}},
+    {"name": "conf_0.5",       "params": {"detectionCon": 0.5, "trackCon": 0.5}},
+    {"name": "two_hands",      "params": {"maxHands": 2}},
+    {"name": "infer_320",      "params": {"inferenceWidth": 320}},
+    {"name": "roi",            "params": {"roi": True}},
+    {"name": "roi_infer_320",  "params": {"roi": True, "inferenceWidth": 320}},
+]
+
+STAGES = ("find_hands", "find_position", "recognize_gesture")
+
+
+def peak_rss_mb():
+    """Пиковый RSS процесса в МБ (None, если платформа не даёт этих данных)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт КБ, macOS — байты
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def iter_clip_frames(path, max_frames=None):
+    cap = cv2.VideoCapture(path)
+    try:
+        count = 0
+        while max_frames is None or count < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+            count += 1
+    finally:
+        cap.release()
+
+
+def iter_synthetic_frames(count, width, height, seed=0):
+    """Детерминированные кадры-шум — для замера стоимости пути без руки."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        yield np.roll(base, i * 4, axis=1)
+
+
+def collect_sources(args):
+    """Список (имя, фабрика генератора кадров)."""
+    sources = []
+    if args.clips:
+        paths = [args.clips] if os.path.isfile(args.clips) else sorted(
+            os.path.join(args.clips, f) for f in os.listdir(args.clips)
+            if f.lower().endswith(VIDEO_EXTENSIONS)
+        )
+        for p in paths:
+            sources.append((os.path.basename(p), lambda p=p: iter_clip_frames(p, args.max_frames)))
+    if args.synthetic:
+        w, h = (int(v) for v in args.size.lower().split("x"))
+        sources.append((f"synthetic_{w}x{h}", lambda: iter_synthetic_frames(args.synthetic, w, h)))
+    return sources
+
+
+def run_config(config, sources, warmup=10, trace_memory=False):
+    import HandTracking as ht
+
+    params = dict(config["params"])
+    if isinstance(params.get("classifier"), str):
+        from gesture_classifier import GestureClassifier
+        params["classifier"] = GestureClassifier.load(params["classifier"])
+    detector = ht.HandDetector(**params)
+    profiler = PipelineProfiler(window=None)
+    frames = 0
+    hands_found = 0
+    gestures = {}
+
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter_ns()
+
+    for _, make_frames in sources:
+        # ROI и сглаживание с конца прошлого клипа не должны влиять на начало следующего
+        detector.reset()
+        for i, frame in enumerate(make_frames()):
+            t0 = time.perf_counter_ns()
+            detector.find_hands(frame, draw=False)
+            t1 = time.perf_counter_ns()
+            lm_list = detector.find_position(frame)
+            t2 = time.perf_counter_ns()
+            gesture = detector.recognize_gesture() if lm_list is not None else "unknown"
+            t3 = time.perf_counter_ns()
+
+            frames += 1
+            # Первые кадры каждого клипа — прогрев графа MediaPipe, в статистику не идут
+            if i < warmup:
+                continue
+            profiler.record("find_hands", t1 - t0)
+            profiler.record("find_position", t2 - t1)
+            profiler.record("recognize_gesture", t3 - t2)
+            profiler.record("total", t3 - t0)
+            if lm_list is not None:
+                hands_found += 1
+            gestures[gesture] = gestures.get(gesture, 0) + 1
+
+    wall_s = (time.perf_counter_ns() - wall_start) / 1_000_000_000
+    traced_peak = None
+    if trace_memory:
+        traced_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+
+    total = profiler.stage_stats("total")
+    return {
+        "name": config["name"],
+        "params": config["params"],
+        "frames": frames,
+        "measured_frames": total["count"] if total else 0,
+        "wall_time_s": round(wall_s, 3),
+        "throughput_fps": round(1000 / total["mean_ms"], 1) if total and total["mean_ms"] else 0.0,
+        "stages": {s: profiler.stage_stats(s) for s in STAGES + ("total",)},
+        "hands_found": hands_found,
+        "gestures": gestures,
+        "python_peak_mb": traced_peak,
+        "process_peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def collect_hands(sources, detector):
+    """Точки рук со всех кадров с рукой: список (lmNorm (n, 21, 3), handedness)."""
+    batches = []
+    for _, make_frames in sources:
+        detector.reset()
+        for frame in make_frames():
+            detector.find_hands(frame, draw=False)
+            if detector.find_position(frame) is not None:
+                n = detector.numHands
+                batches.append((detector.lmNormAll[:n].copy(), list(detector.handedness)))
+    return batches
+
+
+def run_classify_benchmark(sources, classifier_path, repeat=20):
+    """
+    Стоимость HandDetector._classify для правил и для обученного классификатора
+    на одних и тех же руках, плюс доля совпадающих ответов и доля "unknown".
+    """
+    import HandTracking as ht
+    from gesture_classifier import GestureClassifier
+
+    detector = ht.HandDetector(maxHands=2)
+    batches = collect_hands(sources, detector)
+    if not batches:
+        return {"error": "в клипах не найдено ни одной руки"}
+
+    backends = {"rules": None, "classifier": GestureClassifier.load(classifier_path)}
+    profiler = PipelineProfiler(window=None)
+    answers = {}
+    total_ns = {}
+    for name, classifier in backends.items():
+        detector.classifier = classifier
+        answers[name] = []
+        total_ns[name] = 0
+        for lm, handedness in batches:
+            n = len(lm)
+            detector.lmNormAll[:n] = lm
+            detector.numHands = n
+            detector.handedness = handedness
+            for _ in range(repeat):
+                t0 = time.perf_counter_ns()
+                detector._classify()
+                dt = time.perf_counter_ns() - t0
+                profiler.record(name, dt)
+                total_ns[name] += dt
+            answers[name].extend(detector.gestures)
+
+    total = len(answers["rules"])
+    calls = len(batches) * repeat
+    return {
+        "classifier": classifier_path,
+        "frames": len(batches),
+        "hands": total,
+        "stages": {name: profiler.stage_stats(name) for name in backends},
+        # Доли миллисекунды округляются в stage_stats — среднее в мкс считаем отдельно
+        "mean_us": {name: round(ns / calls / 1000, 2) for name, ns in total_ns.items()},
+        "speedup": round(total_ns["rules"] / total_ns["classifier"], 2),
+        "agreement": round(sum(a == b for a, b in zip(answers["rules"], answers["classifier"])) / total, 3),
+        "unknown_rate": {name: round(a.count("unknown") / total, 3) for name, a in answers.items()},
+    }
+
+
+def environment():
+    import mediapipe as mp
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "mediapipe": getattr(mp, "__version__", None),
+        "numpy": np.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера распознавания жестов")
+    parser.add_argument("--clips", help="видеофайл или папка с записанными клипами")
+    parser.add_argument("--synthetic", type=int, default=0, help="число синтетических кадров")
+    parser.add_argument("--size", default="1280x720", help="размер синтетических кадров, ШxВ")
+    parser.add_argument("--max-frames", type=int, help="ограничить число кадров на клип")
+    parser.add_argument("--configs", help="JSON-файл со списком конфигураций детектора")
+    parser.add_argument("--only", nargs="*", help="прогнать только конфигурации с этими именами")
+    parser.add_argument("--warmup", type=int, default=10, help="кадров прогрева на клип")
+    parser.add_argument("--classifier", help="веса gesture_classifier (.npz) для сравнения с правилами")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="считать пик Python-аллокаций (tracemalloc; замедляет прогон)")
+    parser.add_argument("--out", help="куда записать результат (JSON); по умолчанию — stdout")
+    args = parser.parse_args(argv)
+
+    if not args.clips and not args.synthetic:
+        parser.error("нужен --clips и/или --synthetic")
+
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as f:
+            configs = json.load(f)
+    if args.only:
+        configs = [c for c in configs if c["name"] in args.only]
+
+    sources = collect_sources(args)
+    if not sources:
+        parser.error("не найдено ни одного клипа")
+
+    results = []
+    for config in configs:
+        print(f"▶ {config['name']} ...", file=sys.stderr)
+        results.append(run_config(config, sources, warmup=args.warmup, trace_memory=args.trace_memory))
+
+    report = {
+        "environment": environment(),
+        "sources": [name for name, _ in sources],
+        "results": results,
+    }
+    if args.classifier:
+        print("▶ classify: rules vs classifier ...", file=sys.stderr)
+        report["classify"] = run_classify_benchmark(sources, args.classifier)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
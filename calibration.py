@@ -0,0 +1,82 @@
+import numpy as np
+
+from gesture_classifier import GestureClassifier, landmark_features
+
+
+# Позы калибровки в порядке записи
+CALIBRATION_POSES = ("neutral", "rock", "scissors", "paper")
+
+
+class CalibrationRecorder:
+    """
+    Пошаговая запись поз пользователя для персонального классификатора жестов.
+
+    Для каждой позы из poses: prepare_s секунд, чтобы принять позу, затем
+    запись record_s секунд. Запись позы продолжается, пока не набрано
+    min_samples кадров с рукой, поэтому короткая потеря руки не портит
+    калибровку. Время отсчитывается по времени захвата кадров, как и во
+    всём конвейере. По окончании fit() строит GestureClassifier — центроиды
+    и пороги под руку, камеру и посадку конкретного пользователя.
+    """
+
+    def __init__(self, poses=CALIBRATION_POSES, prepare_s=2.0, record_s=1.5, min_samples=15):
+        self.poses = tuple(poses)
+        self.prepare_ns = int(prepare_s * 1_000_000_000)
+        self.record_ns = int(record_s * 1_000_000_000)
+        self.min_samples = min_samples
+        self.phase = "prepare"       # "prepare" | "record"
+        self._index = 0
+        self._phase_start_ns = None
+        self._features = []
+        self._labels = []
+        self.counts = {p: 0 for p in self.poses}
+
+    @property
+    def done(self):
+        return self._index >= len(self.poses)
+
+    @property
+    def pose(self):
+        """Текущая поза или None, если калибровка завершена."""
+        return None if self.done else self.poses[self._index]
+
+    @property
+    def step(self):
+        """Номер текущей позы (с нуля)."""
+        return self._index
+
+    def update(self, lm_norm, thumb_sign, frame_ns):
+        """
+        Принимает нормированные точки руки (21, 3) или None и сторону руки
+        (-1 — правая, +1 — левая, как HandDetector.thumbSign).
+        """
+        if self.done:
+            return
+        if self._phase_start_ns is None:
+            self._phase_start_ns = frame_ns
+        elapsed = frame_ns - self._phase_start_ns
+
+        if self.phase == "prepare":
+            if elapsed >= self.prepare_ns:
+                self.phase = "record"
+                self._phase_start_ns = frame_ns
+            return
+
+        if lm_norm is not None:
+            pts = np.asarray(lm_norm, np.float32)[None].copy()
+            self._features.append(landmark_features(pts, np.array([thumb_sign], np.float32))[0])
+            self._labels.append(self.pose)
+            self.counts[self.pose] += 1
+
+        if elapsed >= self.record_ns and self.counts[self.pose] >= self.min_samples:
+            self._index += 1
+            self.phase = "prepare"
+            self._phase_start_ns = frame_ns
+
+    def fit(self, margin=2.0):
+        """Строит классификатор по записанным позам. ValueError, если поз записано мало."""
+        missing = [p for p in self.poses if self.counts[p] < self.min_samples]
+        if missing:
+            raise ValueError(f"Недостаточно кадров для поз: {', '.join(missing)}")
+        return GestureClassifier.fit(np.stack(self._features), np.array(self._labels, dtype=object),
+                                     margin=margin)
@@ -0,0 +1,252 @@
+import threading
+import time
+import cv2
+
+
+class CameraCapture:
+    """
+    Захват кадров камеры в отдельном потоке.
+
+    Поток владеет cv2.VideoCapture и непрерывно читает кадры, храня только
+    самый свежий (одноместный кольцевой буфер). Каждый кадр помечается
+    монотонным временем захвата time.perf_counter_ns() — тем же часами,
+    которыми ReactionTrainer меряет реакцию.
+
+    GUI-поток забирает кадр через read_latest() без блокировки: если нового
+    кадра нет, сразу возвращается None.
+
+    Подготовка кадра тоже идёт в потоке захвата: mirror=True отзеркаливает
+    кадр, display_size=(w, h) один раз уменьшает его до размера экрана
+    (с сохранением пропорций). GUI остаётся только обернуть готовый
+    BGR-буфер в QImage — без cvtColor и масштабирования на своей стороне.
+
+    on_frame — необязательный вызов без аргументов после каждого нового кадра
+    (из потока захвата), например FrameScheduler.notify_frame.
+
+    backend — бэкенд OpenCV (cv2.CAP_*), None — выбор OpenCV; рабочие
+    пары устройство/бэкенд находит camera_probe. start_async() открывает
+    камеру вне вызывающего потока, switch_device() меняет камеру на ходу,
+    не останавливая поток захвата.
+    """
+
+    def __init__(self, device=0, width=None, height=None, fps=None,
+                 mirror=False, display_size=None, profiler=None, backend=None):
+        self.device = device
+        self.backend = backend
+        self.cap = None
+        self.profiler = profiler    # perf_stats.PipelineProfiler или None
+        self.mirror = mirror
+        self.display_size = display_size
+
+        # Запрошенные параметры камеры (None — оставить значения драйвера)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        # Фактические параметры, которые камера согласилась выдавать
+        self.frame_size = None
+        self.actual_fps = None
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._stopped = False
+
+        # Одноместный буфер: (кадр, кадр для экрана, время захвата в нс, порядковый номер)
+        self._frame = None
+        self._display = None
+        self._frame_ns = 0
+        self._seq = 0
+        self._read_seq = 0
+        self.dropped_frames = 0
+        self.on_frame = None
+
+        # Новая камера, подготовленная switch_device(): (cap, устройство, бэкенд, on_done)
+        self._next = None
+        self._switch_id = 0
+
+    def start(self):
+        """Открывает камеру и запускает поток захвата. Возвращает False, если камера не открылась."""
+        cap = self._open_device(self.device, self.backend)
+        if cap is None:
+            return False
+        self.cap = cap
+        self.frame_size, self.actual_fps = self._apply_settings(cap)
+        return self._start_thread()
+
+    def start_async(self, on_done):
+        """
+        Как start(), но камера открывается в отдельном потоке: открытие может
+        занимать секунды, и GUI не должен их ждать. on_done(ok) вызывается
+        из этого потока. Если до открытия вызван stop(), камера закрывается
+        и on_done получает False.
+        """
+        threading.Thread(target=self._open_async, args=(on_done,),
+                         name="CameraOpen", daemon=True).start()
+
+    def _open_async(self, on_done):
+        cap = self._open_device(self.device, self.backend)
+        ok = cap is not None
+        if ok:
+            settings = self._apply_settings(cap)
+            with self._lock:
+                ok = not self._stopped
+                if ok:
+                    self.cap = cap
+                    self.frame_size, self.actual_fps = settings
+                    self._start_thread()
+            if not ok:
+                cap.release()
+        on_done(ok)
+
+    @staticmethod
+    def _open_device(device, backend):
+        cap = cv2.VideoCapture(device) if backend is None else cv2.VideoCapture(device, backend)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _start_thread(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return True
+
+    def _apply_settings(self, cap):
+        """Запрашивает у камеры размер и FPS. Возвращает (фактический размер, фактический FPS)."""
+        if self.width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        # Драйвер может округлить запрошенное — запоминаем, что получилось
+        frame_size = (
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        return frame_size, cap.get(cv2.CAP_PROP_FPS) or None
+
+    def switch_device(self, device, backend=None, on_done=None):
+        """
+        Переключает захват на другую камеру, не останавливая его.
+
+        Новая камера открывается в отдельном потоке (это может занять
+        секунды), пока старая продолжает отдавать кадры; поток захвата
+        подменяет её между двумя кадрами. on_done(ok) вызывается из фонового
+        потока: True — кадры идут уже с новой камеры, False — она не открылась
+        и захват остался на прежней. Повторный вызов отменяет незавершённое
+        переключение.
+        """
+        with self._lock:
+            self._switch_id += 1
+            switch_id = self._switch_id
+        threading.Thread(target=self._open_next, args=(switch_id, device, backend, on_done),
+                         name="CameraSwitch", daemon=True).start()
+
+    def _open_next(self, switch_id, device, backend, on_done):
+        cap = self._open_device(device, backend)
+        if cap is not None:
+            settings = self._apply_settings(cap)
+            with self._lock:
+                # Захват остановлен или запрошено другое устройство — эта камера не нужна
+                if self._running and switch_id == self._switch_id:
+                    self._next = (cap, device, backend, settings, on_done)
+                    return
+            cap.release()
+        if on_done:
+            on_done(False)
+
+    def _take_next(self):
+        """Из потока захвата: подменяет камеру, если switch_device() подготовил новую."""
+        with self._lock:
+            if self._next is None:
+                return
+            cap, device, backend, settings, on_done = self._next
+            self._next = None
+            old, self.cap = self.cap, cap
+            self.device, self.backend = device, backend
+            self.frame_size, self.actual_fps = settings
+        old.release()
+        if on_done:
+            on_done(True)
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+        with self._lock:
+            self._frame = None
+            self._display = None
+            if self._next is not None:
+                self._next[0].release()
+                self._next = None
+
+    def is_running(self):
+        return self._running
+
+    def _run(self):
+        while self._running:
+            self._take_next()
+            t0 = time.perf_counter_ns()
+            ret, frame = self.cap.read()
+            if not ret:
+                # Камера временно не отдала кадр — не крутим процессор вхолостую
+                time.sleep(0.005)
+                continue
+            frame_ns = time.perf_counter_ns()
+            if self.profiler:
+                self.profiler.record("cap.read", frame_ns - t0)
+            self._publish(frame, frame_ns)
+
+    def _prepare(self, frame):
+        """Зеркалит кадр и готовит уменьшенную копию для экрана. Возвращает (кадр, кадр_для_экрана)."""
+        if self.mirror:
+            frame = cv2.flip(frame, 1)
+        display = None
+        if self.display_size:
+            h, w = frame.shape[:2]
+            tw, th = self.display_size
+            scale = min(tw / w, th / h)
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            display = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return frame, display
+
+    def _publish(self, frame, frame_ns):
+        """Кладёт кадр в одноместный буфер, вытесняя незабранный."""
+        if self.profiler:
+            self.profiler.tick("camera")
+            with self.profiler.measure("prepare"):
+                frame, display = self._prepare(frame)
+        else:
+            frame, display = self._prepare(frame)
+        with self._lock:
+            # Предыдущий кадр никто не забрал — он вытесняется
+            if self._seq > self._read_seq:
+                self.dropped_frames += 1
+                if self.profiler:
+                    self.profiler.count_dropped("capture")
+            self._frame = frame
+            self._display = display
+            self._frame_ns = frame_ns
+            self._seq += 1
+        if self.on_frame:
+            self.on_frame()
+
+    def read_latest(self):
+        """
+        Возвращает (кадр, кадр_для_экрана, время захвата в нс, номер кадра)
+        для кадра, который ещё не забирали, иначе None. кадр_для_экрана — None,
+        если display_size не задан. Никогда не блокируется на камере.
+        """
+        with self._lock:
+            if self._frame is None or self._seq == self._read_seq:
+                return None
+            self._read_seq = self._seq
+            return self._frame, self._display, self._frame_ns, self._seq
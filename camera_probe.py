@@ -0,0 +1,140 @@
+"""
+Поиск камер: какие индексы устройств открываются, через какой бэкенд
+OpenCV и с какими параметрами.
+
+Открытие камеры (особенно виртуальной или через медленный бэкенд) может
+занимать секунды, поэтому перебор идёт в фоне (TrainPage.probe_cameras), а найденные
+рабочие конфигурации кэшируются в JSON на диске: при следующем запуске
+список доступен сразу, а камера открывается заведомо рабочим бэкендом.
+Пока кэш свежий (cache_is_fresh), перебор не запускается вовсе — лишние
+открытия устройств мешают захвату на бэкендах с монопольным доступом
+(DSHOW/MSMF). Заново камеры ищутся, если кэша нет, он устарел или
+выбранная камера не открылась.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import cv2
+
+
+# Файл кэша (рядом с локальной БД); NEUROSPRINT_CAMERA_CACHE — другой путь
+CACHE_PATH = os.environ.get("NEUROSPRINT_CAMERA_CACHE", "camera_cache.json")
+# Через сколько кэш считается устаревшим и камеры ищутся заново
+CACHE_MAX_AGE = timedelta(days=7)
+
+
+def platform_backends():
+    """Бэкенды OpenCV в порядке предпочтения для текущей ОС."""
+    if sys.platform == "win32":
+        return [cv2.CAP_DSHOW, cv2.CAP_MSMF]
+    if sys.platform == "darwin":
+        return [cv2.CAP_AVFOUNDATION]
+    return [cv2.CAP_V4L2, cv2.CAP_ANY]
+
+
+def probe_device(index, backend):
+    """
+    Пробует открыть устройство index через backend и прочитать кадр.
+    Возвращает конфигурацию {index, backend, backend_name, width, height,
+    fps, open_ms} или None, если устройство не отдаёт кадры.
+    """
+    t0 = time.perf_counter()
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if not cap.isOpened():
+            return None
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            return None
+        h, w = frame.shape[:2]
+        return {
+            "index":        index,
+            "backend":      backend,
+            "backend_name": cap.getBackendName(),
+            "width":        w,
+            "height":       h,
+            "fps":          cap.get(cv2.CAP_PROP_FPS) or None,
+            "open_ms":      round((time.perf_counter() - t0) * 1000, 1),
+        }
+    finally:
+        cap.release()
+
+
+def probe_cameras(max_index=8, backends=None, max_misses=2):
+    """
+    Перебирает индексы устройств и бэкенды. Для каждого индекса остаётся
+    самый быстро открывающийся бэкенд. Перебор останавливается после
+    max_misses пустых индексов подряд.
+    """
+    backends = backends or platform_backends()
+    cameras = []
+    misses = 0
+    for index in range(max_index):
+        found = [cfg for cfg in (probe_device(index, b) for b in backends) if cfg]
+        if not found:
+            misses += 1
+            if misses >= max_misses:
+                break
+            continue
+        misses = 0
+        cameras.append(min(found, key=lambda cfg: cfg["open_ms"]))
+    return cameras
+
+
+def camera_label(cfg):
+    return f"Камера {cfg['index']} · {cfg['backend_name']} · {cfg['width']}×{cfg['height']}"
+
+
+def load_cache(path=None):
+    """Кэш {"cameras": [...], "selected": {"index", "backend"} | None, "probed_at"}; пустой, если файла нет."""
+    try:
+        with open(path or CACHE_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"cameras": [], "selected": None, "probed_at": None}
+    data.setdefault("cameras", [])
+    data.setdefault("selected", None)
+    data.setdefault("probed_at", None)
+    return data
+
+
+def cache_is_fresh(cache, max_age=CACHE_MAX_AGE):
+    """Есть ли в кэше найденные камеры и не старше ли перебор max_age."""
+    if not cache["cameras"] or not cache["probed_at"]:
+        return False
+    try:
+        probed_at = datetime.fromisoformat(cache["probed_at"])
+    except (TypeError, ValueError):
+        return False
+    return datetime.now() - probed_at < max_age
+
+
+def save_cache(cache, path=None):
+    try:
+        with open(path or CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+
+def refresh_cache(exclude=None):
+    """
+    Перебирает камеры и обновляет кэш на диске (выбор пользователя
+    сохраняется). Возвращает весь обновлённый кэш — вместе со свежим
+    probed_at, чтобы последующий save_cache() его не затёр.
+
+    Устройство exclude (уже открытое приложением) не перебирается — вторичное
+    открытие занятой камеры может помешать захвату; его запись в кэше
+    остаётся прежней. Занимает секунды — вызывать вне GUI-потока.
+    """
+    cache = load_cache()
+    kept = [c for c in cache["cameras"] if c["index"] == exclude]
+    found = [c for c in probe_cameras() if c["index"] != exclude]
+    cache["cameras"] = sorted(kept + found, key=lambda c: c["index"])
+    cache["probed_at"] = datetime.now().isoformat()
+    save_cache(cache)
+    return cache
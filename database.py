@@ -1,4 +1,5 @@
 import sqlite3
+import threading
 from datetime import datetime
 import json
 import urllib.request
@@ -6,61 +7,318 @@ import urllib.parse
 import urllib.error
 
 
+# Настройки соединения, применяются один раз при его открытии.
+# synchronous=NORMAL в режиме WAL не нарушает целостность БД при сбое: при
+# отключении питания теряются лишь последние транзакции, зато коммит без fsync.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",        # 8 МБ кэша страниц
+    "PRAGMA mmap_size=67108864",      # до 64 МБ файла БД читаются через mmap
+    "PRAGMA temp_store=MEMORY",
+)
+# Сколько подготовленных запросов держит каждое соединение. По умолчанию
+# в sqlite3 их 128; get_sessions собирает текст запроса из набора полей
+# (до четырёх вариантов на набор — с after/limit и без), поэтому берём
+# с запасом, чтобы постоянные запросы не вытеснялись из кэша
+CACHED_STATEMENTS = 256
+
+# Столбцы таблицы trials — ключи словаря раунда из ReactionTrainer.session_data["trials"]
+TRIAL_COLUMNS = (
+    "round_gesture", "color", "response",
+    "reaction_time", "reaction_time_raw", "movement_onset", "movement_time",
+    "presentation_delay", "wrong_attempts", "timestamp",
+)
+
+
+def trial_rows(session_id, trials_data):
+    """Строки для INSERT INTO trials: (session_id, trial_no, *TRIAL_COLUMNS)."""
+    return [
+        (session_id, i) + tuple(t.get(col) for col in TRIAL_COLUMNS)
+        for i, t in enumerate(trials_data)
+    ]
+
+
+# Поля сессии для get_sessions(fields=...) → выражение SQL (s — sessions)
+_TRIALS_COUNT_SQL = "(SELECT COUNT(*) FROM trials t WHERE t.session_id = s.id)"
+SESSION_FIELDS = {
+    "id":            "s.id",
+    "date":          "s.date",
+    "avg_reaction":  "s.avg_reaction",
+    "min_reaction":  "s.min_reaction",
+    "max_reaction":  "s.max_reaction",
+    "std_deviation": "s.std_deviation",
+    "total_wrong":   "s.total_wrong",
+    "difficulty":    "COALESCE(s.difficulty, 'medium')",
+    # Считаются по таблице trials: засчитанные раунды и доля верных ответов, %
+    "trials_count":  _TRIALS_COUNT_SQL,
+    "accuracy":      f"""CASE WHEN {_TRIALS_COUNT_SQL} + s.total_wrong > 0
+                         THEN 100.0 * {_TRIALS_COUNT_SQL} / ({_TRIALS_COUNT_SQL} + s.total_wrong)
+                         ELSE 0.0 END""",
+}
+# Поля, которые отдавал get_user_sessions
+SUMMARY_FIELDS = ("id", "date", "avg_reaction", "min_reaction", "max_reaction",
+                  "std_deviation", "total_wrong", "difficulty")
+
+
+INSERT_TRIALS_SQL = (
+    f"INSERT OR IGNORE INTO trials (session_id, trial_no, {', '.join(TRIAL_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(TRIAL_COLUMNS) + 2))})"
+)
+
+
+# ─── Схема и миграции ────────────────────────────────────────────────
+# MIGRATIONS[i] переводит схему из версии i в i + 1. Версия 0 — и новая БД,
+# и БД, созданная до появления версий: первые миграции поэтому используют
+# IF NOT EXISTS и проверяют столбцы. Новые изменения схемы — только новой
+# функцией в конце списка.
+
+def _schema_v1(cursor):
+    """Базовые таблицы."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            age INTEGER,
+            gender TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            avg_reaction REAL,
+            min_reaction REAL,
+            max_reaction REAL,
+            std_deviation REAL,
+            total_wrong INTEGER,
+            difficulty TEXT DEFAULT 'medium',
+            trials_data TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # Старые БД: difficulty
+    cursor.execute("PRAGMA table_info(sessions)")
+    cols = [row[1] for row in cursor.fetchall()]
+    if 'difficulty' not in cols:
+        cursor.execute("ALTER TABLE sessions ADD COLUMN difficulty TEXT DEFAULT 'medium'")
+
+    # Персональная калибровка жестов: веса GestureClassifier (.npz)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS gesture_calibration (
+            user_id INTEGER PRIMARY KEY,
+            model BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS active_session (
+            user_id INTEGER PRIMARY KEY,
+            last_login TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+
+def _schema_v2(cursor):
+    """
+    Раунды сессий — таблица trials вместо JSON в sessions.trials_data.
+    Раунды из JSON переносятся, сам JSON очищается; нечитаемый JSON отбрасывается.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trials (
+            session_id INTEGER NOT NULL,
+            trial_no INTEGER NOT NULL,
+            round_gesture TEXT,
+            color TEXT,
+            response TEXT,
+            reaction_time REAL,
+            reaction_time_raw REAL,
+            movement_onset REAL,
+            movement_time REAL,
+            presentation_delay REAL,
+            wrong_attempts INTEGER,
+            timestamp TEXT,
+            PRIMARY KEY (session_id, trial_no),
+            FOREIGN KEY (session_id) REFERENCES sessions (id)
+        )
+    ''')
+
+    cursor.execute("SELECT id, trials_data FROM sessions WHERE trials_data IS NOT NULL")
+    rows = []
+    for session_id, data in cursor.fetchall():
+        try:
+            trials = json.loads(data) if data else []
+        except ValueError:
+            continue
+        rows.extend(trial_rows(session_id, [t for t in trials if isinstance(t, dict)]))
+    if rows:
+        cursor.executemany(INSERT_TRIALS_SQL, rows)
+    cursor.execute("UPDATE sessions SET trials_data = NULL WHERE trials_data IS NOT NULL")
+
+
+def _schema_v3(cursor):
+    """
+    Покрывающие индексы: запросы читают только индекс, не обращаясь к таблице.
+      idx_sessions_user_date — история пользователя (get_sessions: фильтр по
+          user_id, порядок и курсор по (date, id)), get_session_summary и
+          группировка лидерборда по пользователю;
+      idx_sessions_difficulty_user — лидерборд с фильтром по сложности.
+    """
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_user_date ON sessions (
+            user_id, date, id,
+            avg_reaction, min_reaction, max_reaction, std_deviation, total_wrong, difficulty
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_difficulty_user ON sessions (
+            difficulty, user_id, avg_reaction, min_reaction, total_wrong
+        )
+    ''')
+    cursor.execute("ANALYZE")
+
+
+# Вклад строки сессии ({row} — NEW/OLD) в user_stats: прибавить / вычесть
+_STATS_ADD_SQL = '''
+    INSERT INTO user_stats (user_id, difficulty, sessions_count, sum_avg, avg_count,
+                            best_ever, perfect_sessions)
+    VALUES ({row}.user_id, IFNULL({row}.difficulty, ''), 1, IFNULL({row}.avg_reaction, 0),
+            {row}.avg_reaction IS NOT NULL, {row}.min_reaction, {row}.total_wrong = 0)
+    ON CONFLICT (user_id, difficulty) DO UPDATE SET
+        sessions_count   = sessions_count + 1,
+        sum_avg          = sum_avg + excluded.sum_avg,
+        avg_count        = avg_count + excluded.avg_count,
+        best_ever        = CASE WHEN best_ever IS NULL OR excluded.best_ever < best_ever
+                                THEN excluded.best_ever ELSE best_ever END,
+        perfect_sessions = perfect_sessions + excluded.perfect_sessions;
+'''
+_STATS_REMOVE_SQL = '''
+    UPDATE user_stats SET
+        sessions_count   = sessions_count - 1,
+        sum_avg          = sum_avg - IFNULL({row}.avg_reaction, 0),
+        avg_count        = avg_count - ({row}.avg_reaction IS NOT NULL),
+        perfect_sessions = perfect_sessions - ({row}.total_wrong = 0),
+        -- Минимум не вычесть: пересчитываем, только если ушла лучшая сессия
+        best_ever        = CASE WHEN {row}.min_reaction <= best_ever
+                                THEN (SELECT MIN(min_reaction) FROM sessions
+                                      WHERE user_id = {row}.user_id AND difficulty IS {row}.difficulty)
+                                ELSE best_ever END
+    WHERE user_id = {row}.user_id AND difficulty = IFNULL({row}.difficulty, '');
+    DELETE FROM user_stats
+    WHERE user_id = {row}.user_id AND difficulty = IFNULL({row}.difficulty, '') AND sessions_count <= 0;
+'''
+
+
+def _schema_v4(cursor):
+    """
+    user_stats — итоги лидерборда по (пользователь, сложность), которые
+    ведут триггеры на sessions: любая запись в sessions — и клиента, и
+    server.py — обновляет строку в той же транзакции. Лидерборд читает по
+    строке на пользователя вместо пересчёта по всем сессиям.
+    avg_account = sum_avg / avg_count (как AVG — без сессий с NULL);
+    сессии без сложности учитываются под difficulty = ''.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER NOT NULL,
+            difficulty TEXT NOT NULL,
+            sessions_count INTEGER NOT NULL,
+            sum_avg REAL NOT NULL,
+            avg_count INTEGER NOT NULL,
+            best_ever REAL,
+            perfect_sessions INTEGER NOT NULL,
+            PRIMARY KEY (user_id, difficulty),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS user_stats_insert AFTER INSERT ON sessions
+        BEGIN {_STATS_ADD_SQL.format(row="NEW")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS user_stats_delete AFTER DELETE ON sessions
+        BEGIN {_STATS_REMOVE_SQL.format(row="OLD")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS user_stats_update
+        AFTER UPDATE OF user_id, difficulty, avg_reaction, min_reaction, total_wrong ON sessions
+        BEGIN {_STATS_REMOVE_SQL.format(row="OLD")} {_STATS_ADD_SQL.format(row="NEW")} END
+    ''')
+    # Итоги по уже сохранённым сессиям
+    cursor.execute("DELETE FROM user_stats")
+    cursor.execute('''
+        INSERT INTO user_stats (user_id, difficulty, sessions_count, sum_avg, avg_count,
+                                best_ever, perfect_sessions)
+        SELECT user_id, IFNULL(difficulty, ''), COUNT(*), IFNULL(SUM(avg_reaction), 0), COUNT(avg_reaction),
+               MIN(min_reaction), SUM(CASE WHEN total_wrong = 0 THEN 1 ELSE 0 END)
+        FROM sessions GROUP BY user_id, IFNULL(difficulty, '')
+    ''')
+
+
+MIGRATIONS = (_schema_v1, _schema_v2, _schema_v3, _schema_v4)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
 class Database:
     def __init__(self, db_name="neurospint.db"):
         self.db_name = db_name
+        # По одному долгоживущему соединению на поток: sqlite3 не разрешает
+        # пользоваться соединением из чужого потока
+        self._conns = threading.local()
         self.init_db()
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_name)
-        conn.execute("PRAGMA journal_mode=WAL")
+        """
+        Соединение текущего потока; открывается и настраивается при первом вызове.
+        `with conn:` по-прежнему фиксирует или откатывает транзакцию, но не
+        закрывает соединение — следующий вызов возьмёт его же вместе с кэшем
+        подготовленных запросов.
+        """
+        conn = getattr(self._conns, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, cached_statements=CACHED_STATEMENTS)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._conns.conn = conn
         return conn
 
+    def close(self):
+        """Закрывает соединение текущего потока (следующий запрос откроет новое)."""
+        conn = getattr(self._conns, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._conns.conn = None
+
     def init_db(self):
-        with self.get_connection() as conn:
+        """
+        Приводит схему к SCHEMA_VERSION. Номер версии хранится в самом файле БД
+        (PRAGMA user_version): если схема актуальна, запуск обходится одним
+        чтением PRAGMA, без DDL. Недостающие миграции применяются одной
+        транзакцией — при ошибке БД остаётся в прежней версии.
+        """
+        conn = self.get_connection()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # IMMEDIATE: сервер (server.py) может открывать ту же БД — версию
+        # перечитываем уже под блокировкой записи
+        conn.execute("BEGIN IMMEDIATE")
+        try:
             cursor = conn.cursor()
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    age INTEGER,
-                    gender TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    avg_reaction REAL,
-                    min_reaction REAL,
-                    max_reaction REAL,
-                    std_deviation REAL,
-                    total_wrong INTEGER,
-                    difficulty TEXT DEFAULT 'medium',
-                    trials_data TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-
-            # Миграция: difficulty
-            cursor.execute("PRAGMA table_info(sessions)")
-            cols = [row[1] for row in cursor.fetchall()]
-            if 'difficulty' not in cols:
-                cursor.execute("ALTER TABLE sessions ADD COLUMN difficulty TEXT DEFAULT 'medium'")
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS active_session (
-                    user_id INTEGER PRIMARY KEY,
-                    last_login TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            for migrate in MIGRATIONS[version:]:
+                migrate(cursor)
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
 
     def _row_to_user(self, row):
         return {
@@ -141,9 +399,12 @@ class Database:
     def get_active_user(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT user_id FROM active_session ORDER BY last_login DESC LIMIT 1")
+            cursor.execute('''
+                SELECT id, username, age, gender, created_at FROM users
+                WHERE id = (SELECT user_id FROM active_session ORDER BY last_login DESC LIMIT 1)
+            ''')
             row = cursor.fetchone()
-            return self.get_user_by_id(row[0]) if row else None
+            return self._row_to_user(row) if row else None
 
     def clear_active_user(self):
         with self.get_connection() as conn:
@@ -154,19 +415,44 @@ class Database:
     def delete_user(self, user_id):
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM trials WHERE session_id IN (SELECT id FROM sessions WHERE user_id = ?)",
+                (user_id,)
+            )
             cursor.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
             cursor.execute("DELETE FROM active_session WHERE user_id = ?", (user_id,))
+            cursor.execute("DELETE FROM gesture_calibration WHERE user_id = ?", (user_id,))
             cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
             conn.commit()
 
+    def save_calibration(self, user_id, model):
+        """model — байты весов классификатора жестов (GestureClassifier.to_bytes())."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO gesture_calibration (user_id, model, created_at) "
+                "VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (user_id, sqlite3.Binary(model))
+            )
+            conn.commit()
+
+    def get_calibration(self, user_id):
+        """Байты весов персонального классификатора или None, если калибровки нет."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT model FROM gesture_calibration WHERE user_id = ?", (user_id,))
+            row = cursor.fetchone()
+            return bytes(row[0]) if row else None
+
     def save_session(self, user_id, stats, trials_data):
+        """Сессия и её раунды (таблица trials) — одной транзакцией. Возвращает id сессии."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO sessions
                 (user_id, avg_reaction, min_reaction, max_reaction,
-                 std_deviation, total_wrong, difficulty, trials_data)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                 std_deviation, total_wrong, difficulty)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
                 user_id,
                 stats['avg_reaction_time'],
@@ -175,27 +461,100 @@ class Database:
                 stats['std_deviation'],
                 stats['total_wrong'],
                 stats.get('difficulty', 'medium'),
-                json.dumps(trials_data, ensure_ascii=False)
             ))
+            session_id = cursor.lastrowid
+            cursor.executemany(INSERT_TRIALS_SQL, trial_rows(session_id, trials_data))
             conn.commit()
+            return session_id
 
     def get_user_sessions(self, user_id):
+        """Все сессии пользователя (сводки без раундов), новые первыми."""
+        return self.get_sessions(user_id)
+
+    def get_sessions(self, user_id, fields=SUMMARY_FIELDS, limit=None, after=None):
+        """
+        Сессии пользователя, новые первыми, только с полями fields (ключи
+        SESSION_FIELDS). Постранично: limit — размер страницы, after — последняя
+        сессия предыдущей страницы; продолжение ищется по (date, id) — ключу
+        сортировки, без OFFSET, так что любая страница стоит одинаково.
+        "id" и "date" добавляются к полям всегда — это курсор страниц.
+        Раунды сессии — get_session_trials(id).
+        """
+        unknown = set(fields) - SESSION_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Неизвестные поля сессии: {', '.join(sorted(unknown))}")
+        names = list(dict.fromkeys(("id", "date") + tuple(fields)))
+        sql = f"SELECT {', '.join(SESSION_FIELDS[n] for n in names)} FROM sessions s WHERE s.user_id = ?"
+        params = [user_id]
+        if after is not None:
+            sql += " AND (s.date, s.id) < (?, ?)"
+            params += [after["date"], after["id"]]
+        sql += " ORDER BY s.date DESC, s.id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [dict(zip(names, r)) for r in cursor.fetchall()]
+
+    def get_session_summary(self, user_id):
+        """
+        Итоги по всем сессиям пользователя одним запросом:
+        sessions_count, best_reaction, avg_reaction (по сессиям со средним > 0),
+        avg_all (по всем сессиям), perfect_sessions, total_wrong.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT date, avg_reaction, min_reaction, max_reaction,
-                       std_deviation, total_wrong, difficulty, trials_data
-                FROM sessions WHERE user_id = ? ORDER BY date DESC
+                SELECT COUNT(*), MIN(min_reaction),
+                       AVG(CASE WHEN avg_reaction > 0 THEN avg_reaction END),
+                       AVG(avg_reaction),
+                       SUM(CASE WHEN total_wrong = 0 THEN 1 ELSE 0 END),
+                       SUM(total_wrong)
+                FROM sessions WHERE user_id = ?
             ''', (user_id,))
+            r = cursor.fetchone()
+            return {
+                "sessions_count":   r[0],
+                "best_reaction":    r[1],
+                "avg_reaction":     r[2],
+                "avg_all":          r[3],
+                "perfect_sessions": r[4] or 0,
+                "total_wrong":      r[5] or 0,
+            }
+
+    def get_session_trials(self, session_id):
+        """Раунды сессии по порядку — словари с ключами TRIAL_COLUMNS, как в trials_data."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(TRIAL_COLUMNS)} FROM trials WHERE session_id = ? ORDER BY trial_no",
+                (session_id,)
+            )
+            return [dict(zip(TRIAL_COLUMNS, r)) for r in cursor.fetchall()]
+
+    def get_trial_stats(self, user_id, difficulty=None):
+        """
+        Средняя реакция и ошибки по типу раунда (цвет × жест стимула) за все сессии пользователя:
+        [{color, round_gesture, trials, avg_reaction, avg_wrong}].
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT t.color, t.round_gesture, COUNT(*),
+                       AVG(t.reaction_time), AVG(t.wrong_attempts)
+                FROM trials t JOIN sessions s ON s.id = t.session_id
+                WHERE s.user_id = ? AND (? IS NULL OR s.difficulty = ?)
+                GROUP BY t.color, t.round_gesture
+                ORDER BY t.color, t.round_gesture
+            ''', (user_id, difficulty, difficulty))
             return [{
-                "date": r[0],
-                "avg_reaction": r[1],
-                "min_reaction": r[2],
-                "max_reaction": r[3],
-                "std_deviation": r[4],
-                "total_wrong": r[5],
-                "difficulty": r[6] or "medium",
-                "trials_data": json.loads(r[7]) if r[7] else []
+                "color": r[0],
+                "round_gesture": r[1],
+                "trials": r[2],
+                "avg_reaction": round(r[3], 2) if r[3] is not None else None,
+                "avg_wrong": round(r[4], 2) if r[4] is not None else None,
             } for r in cursor.fetchall()]
 
     def get_leaderboard(self, limit=20):
@@ -218,6 +577,7 @@ class Database:
             where_sess  = []
             params_user = []
             params_sess = []
+            # Итоги берутся из user_stats (см. _schema_v4), а не из всех сессий
 
             if gender:
                 where_user.append("u.gender = ?")
@@ -232,7 +592,7 @@ class Database:
                 params_user.append(age_max)
 
             if difficulty:
-                where_sess.append("s.difficulty = ?")
+                where_sess.append("st.difficulty = ?")
                 params_sess.append(difficulty)
 
             user_cond = ("AND " + " AND ".join(where_user)) if where_user else ""
@@ -243,12 +603,12 @@ class Database:
                     u.username,
                     u.age,
                     u.gender,
-                    AVG(s.avg_reaction)  AS avg_account,
-                    COUNT(s.id)          AS sessions_count,
-                    MIN(s.min_reaction)  AS best_ever,
-                    SUM(CASE WHEN s.total_wrong = 0 THEN 1 ELSE 0 END) AS perfect_sessions
+                    SUM(st.sum_avg) / NULLIF(SUM(st.avg_count), 0) AS avg_account,
+                    SUM(st.sessions_count)   AS sessions_count,
+                    MIN(st.best_ever)        AS best_ever,
+                    SUM(st.perfect_sessions) AS perfect_sessions
                 FROM users u
-                JOIN sessions s ON u.id = s.user_id
+                JOIN user_stats st ON u.id = st.user_id
                 WHERE 1=1 {user_cond} {sess_cond}
                 GROUP BY u.id
                 LIMIT ?
@@ -0,0 +1,136 @@
+import threading
+import time
+from PySide6.QtCore import QThread, Signal
+
+
+# Ступени ширины кадра для MediaPipe при автоподстройке
+INFERENCE_WIDTHS = [640, 480, 384, 320, 256]
+
+
+class InferenceAutoTuner:
+    """
+    Подбирает HandDetector.inferenceWidth по измеренному времени распознавания.
+
+    Если сглаженное время кадра не укладывается в бюджет 1/target_fps,
+    ширина уменьшается на ступень; если стабильно укладывается в половину
+    бюджета — увеличивается, но не выше max_width. После каждого шага
+    выдерживается пауза cooldown кадров.
+    """
+
+    def __init__(self, detector, target_fps, max_width=None, cooldown=30):
+        self.detector = detector
+        self.budget_ns = 1_000_000_000 / target_fps
+        self.max_width = max_width or detector.inferenceWidth or INFERENCE_WIDTHS[0]
+        self.widths = [w for w in INFERENCE_WIDTHS if w <= self.max_width] or [self.max_width]
+        self.cooldown = cooldown
+        self._ema_ns = None
+        self._frames_since_change = 0
+        if detector.inferenceWidth not in self.widths:
+            detector.inferenceWidth = self.widths[0]
+
+    def update(self, duration_ns):
+        self._ema_ns = duration_ns if self._ema_ns is None else 0.9 * self._ema_ns + 0.1 * duration_ns
+        self._frames_since_change += 1
+        if self._frames_since_change < self.cooldown:
+            return
+
+        i = self.widths.index(self.detector.inferenceWidth)
+        if self._ema_ns > self.budget_ns and i + 1 < len(self.widths):
+            self.detector.inferenceWidth = self.widths[i + 1]
+        elif self._ema_ns < 0.5 * self.budget_ns and i > 0:
+            self.detector.inferenceWidth = self.widths[i - 1]
+        else:
+            return
+        self._frames_since_change = 0
+        self._ema_ns = None
+
+
+class DetectionWorker(QThread):
+    """
+    Распознавание руки вне GUI-потока.
+
+    GUI отдаёт кадры через submit() и сразу возвращается. Поток держит
+    только один ожидающий кадр: если детектор не успевает, более старый
+    кадр выбрасывается (stale_frames) и обрабатывается самый свежий.
+    Результат приходит в GUI через сигнал result_ready — Qt сам ставит его
+    в очередь событий получателя.
+
+    Результат — словарь:
+      frame_ns — время захвата кадра (perf_counter_ns)
+      lm_list  — копия массива точек (21, 3) в пикселях или None, если руки нет
+      lm_norm  — то же в нормированных координатах MediaPipe
+      gesture  — строка из HandDetector.recognize_gesture()
+      hand     — сторона выбранной руки ("Left"/"Right") или None
+      detect_ns — сколько заняло распознавание кадра, нс
+    """
+
+    result_ready = Signal(object)
+
+    def __init__(self, detector, profiler=None, target_fps=None, parent=None):
+        super().__init__(parent)
+        self.detector = detector
+        self.profiler = profiler    # perf_stats.PipelineProfiler или None
+        # target_fps задан — ширина кадра для MediaPipe подстраивается под него
+        self.tuner = InferenceAutoTuner(detector, target_fps) if target_fps else None
+        self._cond = threading.Condition()
+        self._pending = None
+        self._running = False
+        self.stale_frames = 0
+
+    def submit(self, frame, frame_ns):
+        """Кладёт кадр в очередь на распознавание. Никогда не блокируется на детекторе."""
+        with self._cond:
+            if self._pending is not None:
+                self.stale_frames += 1
+                if self.profiler:
+                    self.profiler.count_dropped("detector")
+            self._pending = (frame, frame_ns)
+            self._cond.notify()
+
+    def start(self, *args, **kwargs):
+        self._running = True
+        super().start(*args, **kwargs)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._pending = None
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame, frame_ns = self._pending
+                self._pending = None
+
+            t0 = time.perf_counter_ns()
+            if self.profiler:
+                with self.profiler.measure("find_hands"):
+                    self.detector.find_hands(frame, draw=False)
+                with self.profiler.measure("find_position"):
+                    lm_list = self.detector.find_position(frame)
+                with self.profiler.measure("recognize"):
+                    gesture = self.detector.recognize_gesture() if lm_list is not None else "unknown"
+                self.profiler.tick("detect")
+            else:
+                self.detector.find_hands(frame, draw=False)
+                lm_list = self.detector.find_position(frame)
+                gesture = self.detector.recognize_gesture() if lm_list is not None else "unknown"
+            detect_ns = time.perf_counter_ns() - t0
+            if self.tuner:
+                self.tuner.update(detect_ns)
+
+            # Массив детектора переиспользуется на следующем кадре — в GUI уходит копия
+            self.result_ready.emit({
+                "frame_ns": frame_ns,
+                "lm_list":  lm_list.copy() if lm_list is not None else None,
+                "lm_norm":  self.detector.lmNorm.copy() if lm_list is not None else None,
+                "gesture":  gesture,
+                "hand":     self.detector.hand_side(),
+                "detect_ns": detect_ns,
+            })
@@ -0,0 +1,42 @@
+"""
+Параметры HandDetector для тренировки — общие для TrainPage и replay.py,
+чтобы прогон записи шёл с тем же детектором, что и живая сессия.
+Модуль не зависит от GUI.
+"""
+
+import os
+from functools import lru_cache
+
+
+# Руки:
+#   NEUROSPRINT_BOTH_HANDS=1             — отслеживать обе руки и брать отвечающую
+#   NEUROSPRINT_RESPONSE_HAND=Left|Right — засчитывать только эту руку
+TRACK_BOTH_HANDS = os.environ.get("NEUROSPRINT_BOTH_HANDS") == "1"
+RESPONSE_HAND = os.environ.get("NEUROSPRINT_RESPONSE_HAND") or None
+
+# NEUROSPRINT_GESTURE_MODEL=<файл .npz> — обученный классификатор жестов
+# (см. gesture_classifier.py) вместо правил по пальцам
+GESTURE_MODEL = os.environ.get("NEUROSPRINT_GESTURE_MODEL")
+
+
+@lru_cache(maxsize=1)
+def gesture_classifier():
+    """Классификатор из GESTURE_MODEL; None — модель не задана или не читается (тогда правила)."""
+    if not GESTURE_MODEL:
+        return None
+    from gesture_classifier import GestureClassifier
+    try:
+        return GestureClassifier.load(GESTURE_MODEL)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def detector_params(diff, classifier=None):
+    """Аргументы HandDetector для уровня diff (запись DIFFICULTY_SETTINGS)."""
+    return {
+        "roi": True,
+        "inferenceWidth": diff["inference_width"],
+        "maxHands": 2 if TRACK_BOTH_HANDS else 1,
+        "responseHand": RESPONSE_HAND,
+        "classifier": classifier or gesture_classifier(),
+    }
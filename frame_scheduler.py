@@ -0,0 +1,90 @@
+import threading
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class FrameScheduler(QObject):
+    """
+    Планировщик обработки кадров вместо фиксированного QTimer.
+
+    Срабатывает по появлению кадра: поток захвата вызывает notify_frame(),
+    и в GUI-поток приходит одно (схлопнутое) уведомление, поэтому нет ни
+    пустых опросов буфера, ни накопившихся тиков. Частота зависит от режима:
+      active  — каждый кадр камеры (раунд идёт или вот-вот начнётся);
+      preview — экономный предпросмотр (ожидание нейтрального жеста, простой):
+                не чаще preview_fps и не чаще половины измеренной пропускной
+                способности детектора, чтобы слабая машина не работала на пределе.
+    Кадр, пришедший раньше допустимого, не теряется: обработка откладывается
+    до конца интервала (будет забран самый свежий кадр на тот момент).
+    Время детектора сообщается через report_detection().
+    """
+
+    frame_ready = Signal()
+    _frame_available = Signal()
+
+    ACTIVE = "active"
+    PREVIEW = "preview"
+    STOPPED = "stopped"
+
+    def __init__(self, preview_fps=10, parent=None):
+        super().__init__(parent)
+        self.preview_fps = preview_fps
+        self.mode = self.STOPPED
+        self._lock = threading.Lock()
+        self._notified = False
+        self._last_ns = 0
+        self._detector_ns = None     # сглаженное время распознавания кадра
+        self._deferred = QTimer(self)
+        self._deferred.setSingleShot(True)
+        self._deferred.timeout.connect(self._emit_frame)
+        self._frame_available.connect(self._on_frame_available)
+
+    def set_mode(self, mode):
+        self.mode = mode
+        if mode == self.ACTIVE and self._deferred.isActive():
+            # Раунд начинается — не ждём конца интервала предпросмотра
+            self._deferred.stop()
+            self._emit_frame()
+
+    def stop(self):
+        self.mode = self.STOPPED
+        self._deferred.stop()
+
+    def report_detection(self, duration_ns):
+        if self._detector_ns is None:
+            self._detector_ns = duration_ns
+        else:
+            self._detector_ns = 0.9 * self._detector_ns + 0.1 * duration_ns
+
+    def notify_frame(self):
+        """Вызывается из потока захвата при каждом новом кадре."""
+        with self._lock:
+            if self._notified:
+                return
+            self._notified = True
+        self._frame_available.emit()
+
+    def _min_interval_ns(self):
+        if self.mode == self.ACTIVE:
+            return 0
+        interval = 1_000_000_000 / self.preview_fps
+        if self._detector_ns:
+            interval = max(interval, 2 * self._detector_ns)
+        return interval
+
+    def _on_frame_available(self):
+        with self._lock:
+            self._notified = False
+        if self.mode == self.STOPPED or self._deferred.isActive():
+            return
+        wait_ns = self._last_ns + self._min_interval_ns() - time.perf_counter_ns()
+        if wait_ns > 0:
+            self._deferred.start(max(1, int(wait_ns // 1_000_000)))
+            return
+        self._emit_frame()
+
+    def _emit_frame(self):
+        if self.mode == self.STOPPED:
+            return
+        self._last_ns = time.perf_counter_ns()
+        self.frame_ready.emit()
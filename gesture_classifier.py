@@ -0,0 +1,245 @@
+"""
+Обучаемый классификатор жестов по точкам руки (альтернатива правилам
+«кончик выше PIP-сустава» в HandDetector).
+
+Модель — ближайший центроид по косинусной близости в пространстве признаков
+руки: координаты 21 точки относительно запястья, нормированные на единичную
+длину (не зависят от размера руки в кадре); у левой руки X отражён, чтобы
+обе руки давали одинаковые признаки. Если близость к ближайшему центроиду
+ниже порога, жест — "unknown". Веса — пара килобайт в .npz.
+
+Обучение по записям, разложенным по папкам с именем жеста:
+    recordings/
+        neutral/*.mp4
+        rock/*.mp4
+        scissors/*.mp4
+        paper/*.mp4
+    python gesture_classifier.py recordings/ --out gestures.npz
+
+Подключение: HandDetector(classifier=GestureClassifier.load("gestures.npz")),
+в TrainPage — через NEUROSPRINT_GESTURE_MODEL=<путь к .npz>. Персональная
+модель пользователя строится калибровкой (calibration.py) и хранится в БД.
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+
+
+NUM_LANDMARKS = 21
+# Число признаков: (x, y) для 21 точки
+NUM_FEATURES = 2 * NUM_LANDMARKS
+
+
+def landmark_features(lm_norm, thumb_sign):
+    """
+    Признаки для пачки рук (для обучения; при распознавании они в явном виде
+    не строятся, см. GestureClassifier.predict).
+    lm_norm — (n, 21, 3) нормированные точки MediaPipe,
+    thumb_sign — (n,) -1 для правой руки, +1 для левой (как HandDetector.thumbSign).
+    Возвращает (n, 42) float32 единичной длины.
+    """
+    pts = lm_norm[:, :, :2] - lm_norm[:, :1, :2]
+    # Приводим к правой руке: у левой X отражается
+    pts[:, :, 0] *= -np.asarray(thumb_sign)[:, None]
+    feats = pts.reshape(len(pts), NUM_FEATURES).astype(np.float32)
+    norms = np.linalg.norm(feats, axis=1, keepdims=True)
+    return feats / np.maximum(norms, 1e-9)
+
+
+def _feature_matrix():
+    """
+    Линейное отображение плоских точек (63 = 21·(x, y, z)) в признаки до
+    нормировки: (x_i − x_0, y_i − y_0). Возвращает (матрицу 63×42, матрицу
+    отражения X 42×42).
+    """
+    a = np.zeros((3 * NUM_LANDMARKS, NUM_FEATURES), np.float32)
+    for i in range(NUM_LANDMARKS):
+        for axis in (0, 1):
+            a[3 * i + axis, 2 * i + axis] += 1
+            a[axis, 2 * i + axis] -= 1
+    flip = np.diag(np.tile(np.array([-1, 1], np.float32), NUM_LANDMARKS))
+    return a, flip
+
+
+class GestureClassifier:
+    """
+    Классификатор «ближайший центроид» по косинусной близости с порогом отказа.
+
+    labels     — имена жестов (k,)
+    centroids  — (k, 42) направления признаков каждого жеста (единичной длины)
+    thresholds — (k,) минимальная близость к центроиду; ниже — "unknown"
+
+    Центрирование по запястью, отражение левой руки и сравнение со всеми
+    центроидами свёрнуты в одну матрицу весов: распознавание пачки рук —
+    одно матричное умножение.
+    """
+
+    def __init__(self, labels, centroids, thresholds):
+        self.labels = np.asarray(labels, dtype=object)
+        self.centroids = np.asarray(centroids, np.float32)
+        self.thresholds = np.asarray(thresholds, np.float32)
+
+        a, flip = _feature_matrix()
+        ct = self.centroids.T
+        # [оценки правой руки | оценки левой руки | признаки для нормы]
+        self._weights = np.ascontiguousarray(np.hstack([a @ ct, a @ (flip @ ct), a]))
+        self._k = len(self.labels)
+        self._labels = self.labels.tolist()
+        self._thresholds = self.thresholds.tolist()
+
+    @classmethod
+    def fit(cls, features, labels, margin=1.5, quantile=0.99):
+        """
+        features — (m, 42) из landmark_features, labels — (m,) имена жестов.
+        Порог класса: близость, которую превосходят quantile его примеров,
+        с запасом margin (во столько раз больше допустимое отклонение от 1).
+        """
+        features = np.asarray(features, np.float32)
+        labels = np.asarray(labels, dtype=object)
+        names = sorted(set(labels.tolist()))
+        centroids, thresholds = [], []
+        for g in names:
+            own = features[labels == g]
+            c = own.mean(axis=0)
+            c /= max(np.linalg.norm(c), 1e-9)
+            sim = own @ c
+            centroids.append(c)
+            thresholds.append(1 - (1 - np.quantile(sim, 1 - quantile)) * margin)
+        return cls(names, np.stack(centroids), thresholds)
+
+    @classmethod
+    def load(cls, path):
+        """path — путь к .npz или файловый объект."""
+        data = np.load(path, allow_pickle=False)
+        return cls(data["labels"].astype(str).tolist(), data["centroids"], data["thresholds"])
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels.tolist(), dtype=str),
+            centroids=self.centroids,
+            thresholds=self.thresholds,
+        )
+
+    def predict_features(self, features):
+        """Имена жестов для (n, 42) признаков из landmark_features."""
+        scores = features @ self.centroids.T
+        best = scores.argmax(axis=1)
+        sim = scores[np.arange(len(best)), best] / np.maximum(np.linalg.norm(features, axis=1), 1e-9)
+        labels = self.labels[best]
+        labels[sim < self.thresholds[best]] = "unknown"
+        return labels.tolist()
+
+    def to_bytes(self):
+        """Веса в виде .npz-байтов — для хранения в БД."""
+        buf = io.BytesIO()
+        self.save(buf)
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.load(io.BytesIO(data))
+
+    def predict(self, lm_norm, thumb_sign):
+        """
+        Жесты для пачки рук: lm_norm (n, 21, 3), thumb_sign (n,) — как у
+        landmark_features, но без построения признаков.
+
+        Оценки всех рук и их нормы считаются вместе; выбор лучшего из k
+        центроидов для каждой руки — на скалярах: на паре рук и четырёх
+        жестах это дешевле накладных расходов ещё нескольких вызовов NumPy.
+        """
+        k = self._k
+        out = lm_norm.reshape(len(lm_norm), -1) @ self._weights
+        q = out[:, 2 * k:]
+        norms = np.sqrt(np.einsum("ij,ij->i", q, q)).tolist()
+        labels, thresholds = self._labels, self._thresholds
+        result = []
+        for row, sign, norm in zip(out[:, :2 * k].tolist(), thumb_sign.tolist(), norms):
+            scores = row[k:] if sign > 0 else row[:k]
+            best = scores.index(max(scores))
+            result.append(labels[best] if scores[best] >= thresholds[best] * norm else "unknown")
+        return result
+
+
+# ─── Обучение по записям ────────────────────────────────────────────
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+
+
+def collect_training_data(root, detector=None, step=1):
+    """
+    Прогоняет клипы из root/<жест>/ через HandDetector.
+    Возвращает (features (m, 42), labels (m,)). step — брать каждый step-й кадр.
+    """
+    import cv2
+    import HandTracking as ht
+
+    if detector is None:
+        detector = ht.HandDetector()
+
+    features, labels = [], []
+    for gesture in sorted(os.listdir(root)):
+        folder = os.path.join(root, gesture)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(VIDEO_EXTENSIONS):
+                continue
+            detector.reset()
+            cap = cv2.VideoCapture(os.path.join(folder, name))
+            index = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                index += 1
+                if index % step:
+                    continue
+                detector.find_hands(frame, draw=False)
+                if detector.find_position(frame) is None:
+                    continue
+                k = detector.handIndex
+                features.append(landmark_features(
+                    detector.lmNormAll[k:k + 1], detector.thumbSign[k:k + 1])[0])
+                labels.append(gesture)
+            cap.release()
+
+    if not features:
+        return np.empty((0, NUM_FEATURES), np.float32), np.empty(0, dtype=object)
+    return np.stack(features), np.array(labels, dtype=object)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обучение классификатора жестов по записям")
+    parser.add_argument("recordings", help="папка с подпапками neutral/rock/scissors/paper")
+    parser.add_argument("--out", default="gestures.npz", help="куда сохранить веса (.npz)")
+    parser.add_argument("--step", type=int, default=1, help="брать каждый N-й кадр")
+    parser.add_argument("--margin", type=float, default=1.5, help="запас порога отказа")
+    args = parser.parse_args(argv)
+
+    features, labels = collect_training_data(args.recordings, step=args.step)
+    if not len(features):
+        parser.error("в записях не найдено ни одной руки")
+
+    # Каждый пятый кадр — в проверку, остальные — в обучение
+    test = np.arange(len(features)) % 5 == 0
+    model = GestureClassifier.fit(features[~test], labels[~test], margin=args.margin)
+    if test.any():
+        predicted = np.array(model.predict_features(features[test]), dtype=object)
+        accuracy = float((predicted == labels[test]).mean())
+        print(f"точность на отложенных кадрах: {accuracy:.3f} ({test.sum()} кадров)", file=sys.stderr)
+
+    model = GestureClassifier.fit(features, labels, margin=args.margin)
+    model.save(args.out)
+    for g in model.labels:
+        print(f"  {g}: {(labels == g).sum()} кадров", file=sys.stderr)
+    print(f"веса сохранены в {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
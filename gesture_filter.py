@@ -0,0 +1,86 @@
+from collections import deque
+
+
+class GestureFilter:
+    """
+    Потоковое сглаживание жестов между HandDetector и ReactionTrainer.
+
+    На вход подаётся жест каждого кадра, на выходе — устойчивый жест
+    (stable) и события «начало жеста» (onset). Новый жест становится
+    устойчивым, когда:
+      - он распознан min_hold кадров подряд;
+      - его доля в окне из window последних кадров не меньше enter_ratio;
+      - доля текущего устойчивого жеста упала до exit_ratio или ниже
+        (гистерезис: одиночный шумный кадр не сбивает устойчивый жест).
+
+    Время onset — время захвата ПЕРВОГО кадра подтверждающей серии, поэтому
+    подтверждение через несколько кадров не увеличивает измеряемую реакцию.
+    """
+
+    def __init__(self, window=5, min_hold=2, enter_ratio=0.4, exit_ratio=0.6):
+        self.window = window
+        self.min_hold = min_hold
+        self.enter_ratio = enter_ratio
+        self.exit_ratio = exit_ratio
+        self.reset()
+
+    def reset(self):
+        self._history = deque(maxlen=self.window)
+        self.stable = "unknown"
+        self._run_gesture = None
+        self._run_start_ns = 0
+        self._run_len = 0
+
+    def rearm(self):
+        """
+        Забывает устойчивый жест и текущую серию, не трогая окно.
+
+        Нужен, когда onset пришёл раньше стимула (check_response → "early")
+        или жест уже удерживался к показу стимула: без сброса удерживаемый
+        жест не дал бы нового onset, пока пользователь его не сменит.
+        После rearm() тот же жест даёт onset заново — временем первого
+        кадра новой серии.
+        """
+        self.stable = "unknown"
+        self._run_gesture = None
+        self._run_start_ns = 0
+        self._run_len = 0
+
+    def confidence(self, gesture):
+        """Доля кадров окна, на которых распознан gesture (0..1)."""
+        return self._history.count(gesture) / self.window
+
+    def confidences(self):
+        """Доли всех жестов, встречающихся в окне."""
+        return {g: self.confidence(g) for g in set(self._history)}
+
+    def update(self, gesture, frame_ns):
+        """
+        Принимает жест очередного кадра и время его захвата.
+        Возвращает событие {"gesture", "frame_ns", "confidence"} в момент,
+        когда устойчивый жест сменился, иначе None.
+        """
+        self._history.append(gesture)
+
+        if gesture == self._run_gesture:
+            self._run_len += 1
+        else:
+            self._run_gesture = gesture
+            self._run_start_ns = frame_ns
+            self._run_len = 1
+
+        if gesture == self.stable:
+            return None
+        if self._run_len < self.min_hold:
+            return None
+        if self.confidence(gesture) < self.enter_ratio:
+            return None
+        if self.confidence(self.stable) > self.exit_ratio:
+            return None
+
+        self.stable = gesture
+        return {
+            "gesture":    gesture,
+            "frame_ns":   self._run_start_ns,
+            "confidence": self.confidence(gesture),
+        }
@@ -9,4 +9,11 @@ if __name__ == "__main__":
     styles.apply_global_style(app)
     window = MainWindow()
     window.showMaximized()
+
+    # python main.py --replay session.mp4 script.json — тренировка по записи (см. replay.py)
+    if len(sys.argv) >= 4 and sys.argv[1] == "--replay":
+        from replay import load_stimulus_script
+        window.navigate_to(1)
+        window.train_page.start_replay(sys.argv[2], load_stimulus_script(sys.argv[3]))
+
     sys.exit(app.exec())
@@ -19,6 +19,10 @@ class MainWindow(QMainWindow):
 
         self._init_ui()
         self._update_nav_state()
+        # MediaPipe загружается в фоне, пока пользователь на главной странице
+        self.train_page.warm_up_detector()
+        # Камеры ищутся в фоне, только если кэша на диске нет или он устарел
+        self.train_page.probe_cameras()
 
         # Проверяем сервер каждые 15 секунд.
         # Если сервер появился — синхронизируем накопленные данные.
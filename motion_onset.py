@@ -0,0 +1,67 @@
+import numpy as np
+
+
+# Кончики всех пяти пальцев
+TIP_IDS = np.array([4, 8, 12, 16, 20])
+
+
+class MotionOnsetDetector:
+    """
+    Определяет момент начала движения руки по скорости кончиков пальцев.
+
+    На каждый кадр подаются точки руки из HandDetector.find_position и время
+    захвата кадра. Скорость кончиков считается в размерах ладони в секунду
+    (расстояние запястье → основание среднего пальца), поэтому не зависит от
+    расстояния до камеры и разрешения.
+
+    Рука считается неподвижной, если скорость держится ниже still_speed
+    still_frames кадров подряд. Первый кадр после покоя со скоростью выше
+    move_speed открывает движение; onset_ns — время последнего кадра покоя,
+    т.е. момент, после которого рука пришла в движение.
+    """
+
+    def __init__(self, move_speed=1.5, still_speed=0.6, still_frames=3):
+        self.move_speed = move_speed
+        self.still_speed = still_speed
+        self.still_frames = still_frames
+        self.reset()
+
+    def reset(self):
+        self._prev_tips = None
+        self._prev_ns = 0
+        self._still_count = 0
+        self.moving = False
+        self.speed = 0.0
+        self.onset_ns = None
+
+    def update(self, lm_list, frame_ns):
+        """Возвращает время начала движения, если оно зафиксировано на этом кадре, иначе None."""
+        if lm_list is None:
+            # Рука пропала — непрерывность скорости потеряна
+            self._prev_tips = None
+            return None
+
+        palm = float(np.linalg.norm(lm_list[9, :2] - lm_list[0, :2]))
+        if palm < 1e-6:
+            return None
+        tips = lm_list[TIP_IDS, :2] / palm
+
+        started = None
+        if self._prev_tips is not None and frame_ns > self._prev_ns:
+            dt = (frame_ns - self._prev_ns) / 1_000_000_000
+            self.speed = float(np.max(np.linalg.norm(tips - self._prev_tips, axis=1))) / dt
+
+            if self.speed < self.still_speed:
+                self._still_count += 1
+                if self._still_count >= self.still_frames:
+                    self.moving = False
+            else:
+                if not self.moving and self._still_count >= self.still_frames and self.speed > self.move_speed:
+                    self.moving = True
+                    self.onset_ns = self._prev_ns
+                    started = self.onset_ns
+                self._still_count = 0
+
+        self._prev_tips = tips
+        self._prev_ns = frame_ns
+        return started
@@ -0,0 +1,116 @@
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, p):
+    """Перцентиль по методу ближайшего ранга; sorted_values уже отсортирован."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class PipelineProfiler:
+    """
+    Лёгкий замер времени по стадиям конвейера камера → детектор → экран.
+
+    Для каждой стадии хранится скользящее окно последних window замеров
+    (в наносекундах), из которого считаются p50/p95/p99. Отдельно
+    считаются потерянные кадры (по источнику) и эффективный FPS по
+    моментам вызова tick(). Методы потокобезопасны: стадии пишутся из
+    потока захвата, DetectionWorker и GUI-потока.
+    """
+
+    def __init__(self, window=300):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._ticks = {}
+        self._dropped = {}
+        self._started = time.perf_counter_ns()
+
+    def record(self, stage, duration_ns):
+        with self._lock:
+            buf = self._stages.get(stage)
+            if buf is None:
+                buf = self._stages[stage] = deque(maxlen=self.window)
+            buf.append(duration_ns)
+
+    @contextmanager
+    def measure(self, stage):
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - t0)
+
+    def tick(self, counter="display"):
+        """Отмечает обработанный кадр для расчёта FPS счётчика counter."""
+        now = time.perf_counter_ns()
+        with self._lock:
+            buf = self._ticks.get(counter)
+            if buf is None:
+                buf = self._ticks[counter] = deque(maxlen=self.window)
+            buf.append(now)
+
+    def count_dropped(self, source, n=1):
+        with self._lock:
+            self._dropped[source] = self._dropped.get(source, 0) + n
+
+    def stage_stats(self, stage):
+        with self._lock:
+            values = sorted(self._stages.get(stage, ()))
+        if not values:
+            return None
+        ms = 1_000_000
+        return {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values) / ms, 3),
+            "p50_ms":  round(percentile(values, 50) / ms, 3),
+            "p95_ms":  round(percentile(values, 95) / ms, 3),
+            "p99_ms":  round(percentile(values, 99) / ms, 3),
+        }
+
+    def fps(self, counter="display"):
+        with self._lock:
+            buf = self._ticks.get(counter)
+            if not buf or len(buf) < 2:
+                return 0.0
+            span = buf[-1] - buf[0]
+            n = len(buf) - 1
+        return round(n * 1_000_000_000 / span, 1) if span > 0 else 0.0
+
+    def summary(self):
+        with self._lock:
+            stages = list(self._stages)
+            counters = list(self._ticks)
+            dropped = dict(self._dropped)
+        return {
+            "uptime_s": round((time.perf_counter_ns() - self._started) / 1_000_000_000, 2),
+            "stages": {s: self.stage_stats(s) for s in stages},
+            "fps": {c: self.fps(c) for c in counters},
+            "dropped_frames": dropped,
+        }
+
+    def overlay_text(self):
+        """Короткий многострочный текст для наложения поверх видео."""
+        summary = self.summary()
+        lines = [" ".join(f"{c}:{v:.0f}fps" for c, v in summary["fps"].items())]
+        for stage, st in summary["stages"].items():
+            if st:
+                lines.append(f"{stage:<12} {st['p50_ms']:6.1f} {st['p95_ms']:6.1f} {st['p99_ms']:6.1f}")
+        if summary["dropped_frames"]:
+            lines.append("drop " + " ".join(f"{k}:{v}" for k, v in summary["dropped_frames"].items()))
+        return "\n".join(lines)
+
+    def dump_json(self, path, extra=None):
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
@@ -8,6 +8,14 @@ from PySide6.QtGui import QFont, QColor
 import styles
 
 
+# Сессии в истории и на графиках подгружаются страницами — профиль открывается
+# одинаково быстро при любом числе тренировок
+SESSIONS_PAGE = 50
+# Поля сессии, которые нужны таблице и графикам (см. database.SESSION_FIELDS)
+PROFILE_SESSION_FIELDS = ("date", "avg_reaction", "min_reaction", "max_reaction",
+                          "std_deviation", "total_wrong")
+
+
 def age_label(age):
     if age is None:
         return "Возраст не указан"
@@ -26,6 +34,7 @@ class ProfilePage(QWidget):
         self.main_window = main_window
         self.db = main_window.db
         self._editing = False
+        self._sessions = []          # загруженные строки истории (для курсора «Показать ещё»)
         self._build()
 
     def _build(self):
@@ -334,7 +343,17 @@ class ProfilePage(QWidget):
         self._table = self._build_table()
         self._table.setMinimumHeight(160)
         self._table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
+        self._table.cellDoubleClicked.connect(self._show_session_trials)
         self._dash_layout.addWidget(self._table)
+
+        self._more_btn = QPushButton("Показать ещё")
+        self._more_btn.setCursor(Qt.PointingHandCursor)
+        self._more_btn.setFixedHeight(38)
+        self._more_btn.setStyleSheet(styles.BUTTON_SECONDARY)
+        self._more_btn.setFont(QFont("Segoe UI", 11))
+        self._more_btn.clicked.connect(self._load_more_sessions)
+        self._more_btn.hide()
+        self._dash_layout.addWidget(self._more_btn, 0, Qt.AlignHCenter)
         self._dash_layout.addSpacing(20)
 
         return w
@@ -417,40 +436,46 @@ class ProfilePage(QWidget):
         self._gender_combo.setCurrentIndex(gender_idx)
         self._edit_error.setText("")
 
-        sessions = self.db.get_user_sessions(user['id'])
-        self._fill_stat_cards(sessions)
+        # Итоги считает БД; в память — только первая страница истории
+        self._fill_stat_cards(self.db.get_session_summary(user['id']))
+        sessions = self.db.get_sessions(user['id'], fields=PROFILE_SESSION_FIELDS, limit=SESSIONS_PAGE)
+        self._sessions = []
         self._fill_table(sessions)
         self._draw_charts(sessions)
-        self._adjust_table_height(len(sessions))
+
+    def _load_more_sessions(self):
+        user = self.main_window.current_user
+        if not user or not self._sessions:
+            return
+        more = self.db.get_sessions(user['id'], fields=PROFILE_SESSION_FIELDS,
+                                    limit=SESSIONS_PAGE, after=self._sessions[-1])
+        self._fill_table(more)
 
     def _adjust_table_height(self, rows):
         hdr_h = self._table.horizontalHeader().height()
         h = hdr_h + max(rows, 1) * 44 + 8
         self._table.setMinimumHeight(min(h, 480))
 
-    def _fill_stat_cards(self, sessions):
+    def _fill_stat_cards(self, summary):
+        """summary — Database.get_session_summary()."""
         labels = [
             "Среднее время реакции (мс)",
             "Лучшая реакция (мс)",
             "Тренировок проведено",
             "Тренировок без ошибок",
         ]
-        if not sessions:
+        if not summary['sessions_count']:
             for i, (_, v, l) in enumerate(self._stat_cards):
                 v.setText("—")
                 l.setText(labels[i])
             return
 
-        best_reaction = min(s['min_reaction'] for s in sessions)
-        perfect       = sum(1 for s in sessions if s['total_wrong'] == 0)
-        valid_avgs    = [s['avg_reaction'] for s in sessions if s.get('avg_reaction') and s['avg_reaction'] > 0]
-        account_avg   = sum(valid_avgs) / len(valid_avgs) if valid_avgs else None
-
+        account_avg = summary['avg_reaction']
         values = [
             f"{account_avg:.2f}" if account_avg else "—",
-            f"{best_reaction:.2f}",
-            str(len(sessions)),
-            str(perfect),
+            f"{summary['best_reaction']:.2f}",
+            str(summary['sessions_count']),
+            str(summary['perfect_sessions']),
         ]
         for i, (_, v, l) in enumerate(self._stat_cards):
             v.setText(values[i])
@@ -534,8 +559,13 @@ class ProfilePage(QWidget):
             self._chart_layout.addWidget(ph)
 
     def _fill_table(self, sessions):
-        self._table.setRowCount(0)
-        if not sessions:
+        """Дописывает страницу сессий в таблицу; первая страница (пустой _sessions) заменяет содержимое."""
+        first = not self._sessions
+        if first:
+            self._table.clearSpans()
+            self._table.setRowCount(0)
+        self._more_btn.setVisible(len(sessions) == SESSIONS_PAGE)
+        if first and not sessions:
             self._table.setRowCount(1)
             item = QTableWidgetItem("Пока нет тренировок — начни первую!")
             item.setTextAlignment(Qt.AlignCenter)
@@ -543,10 +573,13 @@ class ProfilePage(QWidget):
             self._table.setSpan(0, 0, 1, 6)
             self._table.setItem(0, 0, item)
             self._table.setRowHeight(0, 60)
+            self._adjust_table_height(1)
             return
 
-        self._table.setRowCount(len(sessions))
-        for row, s in enumerate(sessions):
+        start = len(self._sessions)
+        self._sessions.extend(sessions)
+        self._table.setRowCount(len(self._sessions))
+        for row, s in enumerate(sessions, start):
             date_str = s['date'][:16].replace('T', ' ')
             values = [
                 date_str,
@@ -566,6 +599,24 @@ class ProfilePage(QWidget):
                     ))
                 self._table.setItem(row, col, item)
             self._table.setRowHeight(row, 44)
+        self._adjust_table_height(len(self._sessions))
+
+    def _show_session_trials(self, row, _col):
+        """Раунды сессии загружаются только при открытии её деталей."""
+        if row >= len(self._sessions):
+            return
+        s = self._sessions[row]
+        trials = self.db.get_session_trials(s['id'])
+        if not trials:
+            QMessageBox.information(self, "Раунды", "Для этой тренировки раунды не сохранены.")
+            return
+        color_map = {"green": "🟢", "red": "🔴"}
+        lines = [
+            f"{i}. {color_map.get(t['color'], '')} {t['round_gesture']} → {t['response']}: "
+            f"{t['reaction_time']:.0f} мс" + (f", ошибок {t['wrong_attempts']}" if t['wrong_attempts'] else "")
+            for i, t in enumerate(trials, 1)
+        ]
+        QMessageBox.information(self, f"Раунды · {s['date'][:16].replace('T', ' ')}", "\n".join(lines))
 
     # ─── Авторизация ──────────────────────────────────────────────────
     def _validate_nick(self, username, error_label):
@@ -724,7 +775,9 @@ class ProfilePage(QWidget):
                         pass
                     break
 
-            sessions = self.db.get_user_sessions(user['id'])
+            summary = self.db.get_session_summary(user['id'])
+            # В PDF попадают 30 последних тренировок
+            sessions = self.db.get_sessions(user['id'], fields=PROFILE_SESSION_FIELDS, limit=30)
             c = rl_canvas.Canvas(path, pagesize=A4)
             w_pg, h_pg = A4
 
@@ -761,12 +814,12 @@ class ProfilePage(QWidget):
             # Общая статистика
             draw_text(50, y, "Общая статистика:", 14, bold=True)
             y -= 22
-            if sessions:
-                best_reaction = min(s['min_reaction'] for s in sessions)
-                avg_all = sum(s['avg_reaction'] for s in sessions) / len(sessions)
-                perfect = sum(1 for s in sessions if s['total_wrong'] == 0)
-                total_wrong = sum(s['total_wrong'] for s in sessions)
-                draw_text(60, y, f"Всего тренировок: {len(sessions)}", 12);      y -= 18
+            if summary['sessions_count']:
+                best_reaction = summary['best_reaction']
+                avg_all = summary['avg_all']
+                perfect = summary['perfect_sessions']
+                total_wrong = summary['total_wrong']
+                draw_text(60, y, f"Всего тренировок: {summary['sessions_count']}", 12);      y -= 18
                 draw_text(60, y, f"Лучшая реакция: {best_reaction:.2f} мс", 12); y -= 18
                 draw_text(60, y, f"Среднее по всем тренировкам: {avg_all:.2f} мс", 12); y -= 18
                 draw_text(60, y, f"Тренировок без ошибок: {perfect}", 12);       y -= 18
@@ -794,7 +847,7 @@ class ProfilePage(QWidget):
                     draw_text(col_x[i], y, h_txt, 10, bold=True, color=(0.28, 0.34, 0.41))
                 y -= 20
 
-                for s in sessions[:30]:  # max 30 строк
+                for s in sessions:
                     if y < 60:
                         c.showPage()
                         y = h_pg - 60
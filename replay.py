@@ -0,0 +1,277 @@
+"""
+Воспроизведение тренировки по записанному видео и сценарию стимулов.
+
+Сценарий — JSON-файл:
+    {
+      "difficulty": "medium",
+      "mirror": true,
+      "rounds": [
+        {"at": 2.5, "gesture": "rock",  "color": "green"},
+        {"at": 6.0, "gesture": "paper", "color": "red"}
+      ]
+    }
+at — время показа стимула в секундах от начала видео. Следующий раунд
+показывается не раньше, чем завершён предыдущий.
+
+Запуск без GUI (результат — те же trials_data и get_stats(), что у живой сессии):
+    python replay.py session.mp4 script.json --speed max --out result.json
+
+Детектор настраивается так же, как в TrainPage, по сложности сценария
+(detector_config.detector_params); отдельные параметры можно переопределить:
+    python replay.py session.mp4 script.json --inference-width 640 --no-roi
+"""
+
+import argparse
+import json
+import sys
+import time
+import cv2
+
+from camera_capture import CameraCapture
+from detector_config import detector_params
+from gesture_filter import GestureFilter
+from motion_onset import MotionOnsetDetector
+from trainer_logic import DIFFICULTY_SETTINGS, ReactionTrainer
+
+
+RESPONSE_GESTURES = ("rock", "scissors", "paper")
+
+
+def load_stimulus_script(path):
+    """Читает и проверяет сценарий стимулов. При ошибке формата — ValueError."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    difficulty = data.get("difficulty", "medium")
+    if difficulty not in DIFFICULTY_SETTINGS:
+        raise ValueError(f"Неизвестная сложность: {difficulty}")
+
+    rounds = []
+    for i, r in enumerate(data.get("rounds", [])):
+        if r.get("gesture") not in RESPONSE_GESTURES or r.get("color") not in ("green", "red"):
+            raise ValueError(f"Раунд {i}: нужен gesture из {RESPONSE_GESTURES} и color green/red")
+        rounds.append({
+            "at_ns":   int(float(r.get("at", 0)) * 1_000_000_000),
+            "gesture": r["gesture"],
+            "color":   r["color"],
+        })
+    if not rounds:
+        raise ValueError("Сценарий не содержит раундов")
+
+    return {
+        "difficulty": difficulty,
+        "mirror":     data.get("mirror", True),
+        "rounds":     rounds,
+    }
+
+
+class VideoFileSource(CameraCapture):
+    """
+    Источник кадров из видеофайла с тем же интерфейсом, что CameraCapture.
+
+    Время кадра берётся из его номера и FPS файла, а не из часов машины:
+    start_ns + номер_кадра / fps. В потоковом режиме (start/read_latest) кадры
+    выдаются в темпе оригинала (speed="native"); frames() отдаёт их подряд без
+    пауз — для детерминированного прогона без GUI.
+    """
+
+    def __init__(self, path, speed="native", mirror=False, display_size=None, profiler=None):
+        super().__init__(device=path, mirror=mirror, display_size=display_size, profiler=profiler)
+        self.speed = speed
+        self.start_ns = 0
+        self.finished = False
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.device)
+        if not self.cap.isOpened():
+            self.cap.release()
+            self.cap = None
+            return False
+        self.actual_fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_size = (
+            int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        return True
+
+    def start(self):
+        if not self._open():
+            return False
+        self.finished = False
+        self.start_ns = time.perf_counter_ns()
+        return self._start_thread()
+
+    def video_ns(self):
+        """Текущая позиция воспроизведения в нс от начала видео."""
+        return time.perf_counter_ns() - self.start_ns
+
+    def _frame_time(self, index):
+        return self.start_ns + int(index * 1_000_000_000 / self.actual_fps)
+
+    def _run(self):
+        index = 0
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.finished = True
+                self._running = False
+                # Последнее уведомление — чтобы получатель увидел конец записи
+                if self.on_frame:
+                    self.on_frame()
+                return
+            frame_ns = self._frame_time(index)
+            if self.speed == "native":
+                wait_s = (frame_ns - time.perf_counter_ns()) / 1_000_000_000
+                if wait_s > 0:
+                    time.sleep(wait_s)
+            self._publish(frame, frame_ns)
+            index += 1
+
+    def frames(self):
+        """Генератор (кадр, время кадра в нс от начала видео) — без потоков и пауз."""
+        if self.cap is None and not self._open():
+            return
+        self.start_ns = 0
+        index = 0
+        try:
+            while True:
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                yield frame, self._frame_time(index)
+                index += 1
+        finally:
+            self.finished = True
+            self.cap.release()
+            self.cap = None
+
+
+class ReplaySession:
+    """
+    Детерминированный прогон сессии: каждый кадр видео проходит через тот же
+    конвейер, что и в TrainPage (HandDetector → GestureFilter →
+    MotionOnsetDetector → ReactionTrainer), а все времена берутся из номера
+    кадра. Один и тот же файл и сценарий дают один и тот же результат
+    на любой машине.
+
+    Без явного detector он строится по сложности сценария с теми же
+    параметрами, что в TrainPage; overrides — аргументы HandDetector поверх них.
+    """
+
+    def __init__(self, video_path, script, detector=None, speed="max", overrides=None):
+        self.video_path = video_path
+        self.script = script
+        self.speed = speed
+        if detector is None:
+            import HandTracking as ht
+            params = detector_params(DIFFICULTY_SETTINGS[script["difficulty"]])
+            params.update(overrides or {})
+            detector = ht.HandDetector(**params)
+        self.detector = detector
+
+    def run(self):
+        """Возвращает (stats, trials_data, info) — как ReactionTrainer.reset_session() плюс сведения о прогоне."""
+        rounds = self.script["rounds"]
+        trainer = ReactionTrainer(difficulty=self.script["difficulty"], max_trials=len(rounds))
+        gesture_filter = GestureFilter()
+        motion = MotionOnsetDetector()
+        source = VideoFileSource(self.video_path, speed=self.speed)
+
+        next_round = 0
+        round_active = False
+        frames = 0
+        wall_start = time.perf_counter_ns()
+
+        for frame, frame_ns in source.frames():
+            frames += 1
+            if self.speed == "native":
+                wait_s = (frame_ns - (time.perf_counter_ns() - wall_start)) / 1_000_000_000
+                if wait_s > 0:
+                    time.sleep(wait_s)
+
+            if not round_active and next_round < len(rounds) and frame_ns >= rounds[next_round]["at_ns"]:
+                r = rounds[next_round]
+                trainer.generate_round(r["gesture"], r["color"], start_ns=frame_ns)
+                trainer.mark_presented(frame_ns)
+                round_active = True
+                # Как в TrainPage: удерживаемый к показу жест даёт новый onset
+                if gesture_filter.stable in RESPONSE_GESTURES:
+                    gesture_filter.rearm()
+
+            if self.script["mirror"]:
+                frame = cv2.flip(frame, 1)
+            self.detector.find_hands(frame, draw=False)
+            lm_list = self.detector.find_position(frame)
+            gesture = self.detector.recognize_gesture() if lm_list is not None else "unknown"
+
+            onset = gesture_filter.update(gesture, frame_ns)
+            motion.update(lm_list, frame_ns)
+
+            if round_active and onset and onset["gesture"] in RESPONSE_GESTURES:
+                correct, _, status = trainer.check_response(
+                    onset["gesture"], onset["frame_ns"],
+                    movement_ns=motion.onset_ns, recognized_ns=frame_ns
+                )
+                if status == "early":
+                    gesture_filter.rearm()
+                elif correct:
+                    round_active = False
+                    next_round += 1
+                    if trainer.is_session_complete():
+                        break
+
+        wall_s = (time.perf_counter_ns() - wall_start) / 1_000_000_000
+        stats, trials_data = trainer.reset_session()
+        info = {
+            "video": self.video_path,
+            "frames": frames,
+            "wall_time_s": round(wall_s, 3),
+            "throughput_fps": round(frames / wall_s, 1) if wall_s > 0 else 0.0,
+            "rounds_presented": next_round + (1 if round_active else 0),
+        }
+        return stats, trials_data, info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Прогон тренировки по записанному видео")
+    parser.add_argument("video", help="видеофайл с записью сессии")
+    parser.add_argument("script", help="JSON-сценарий стимулов")
+    parser.add_argument("--speed", choices=("native", "max"), default="max",
+                        help="native — в темпе записи, max — так быстро, как позволяет машина")
+    parser.add_argument("--out", help="куда сохранить результат (JSON); по умолчанию — stdout")
+    # Переопределения параметров детектора (по умолчанию — как в TrainPage для сложности сценария)
+    parser.add_argument("--inference-width", type=int, help="ширина кадра для MediaPipe, px")
+    parser.add_argument("--no-roi", action="store_true", help="искать руку во всём кадре, без ROI")
+    parser.add_argument("--max-hands", type=int, choices=(1, 2), help="сколько рук отслеживать")
+    parser.add_argument("--response-hand", choices=("Left", "Right"), help="засчитывать только эту руку")
+    parser.add_argument("--classifier", help="веса gesture_classifier (.npz) вместо модели по умолчанию")
+    args = parser.parse_args(argv)
+
+    script = load_stimulus_script(args.script)
+    overrides = {}
+    if args.inference_width:
+        overrides["inferenceWidth"] = args.inference_width
+    if args.no_roi:
+        overrides["roi"] = False
+    if args.max_hands:
+        overrides["maxHands"] = args.max_hands
+    if args.response_hand:
+        overrides["responseHand"] = args.response_hand
+    if args.classifier:
+        from gesture_classifier import GestureClassifier
+        overrides["classifier"] = GestureClassifier.load(args.classifier)
+    stats, trials_data, info = ReplaySession(args.video, script, speed=args.speed,
+                                             overrides=overrides).run()
+    result = {"stats": stats, "trials_data": trials_data, "replay": info}
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
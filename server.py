@@ -9,9 +9,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 import sqlite3
-import json
 import os
 from datetime import datetime
+from database import Database, INSERT_TRIALS_SQL, trial_rows
 
 app = FastAPI(title="НейроСпринт API", version="1.0.0")
 
@@ -33,33 +33,11 @@ def get_conn():
 
 
 def init_db():
-    with get_conn() as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                age INTEGER,
-                gender TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                avg_reaction REAL,
-                min_reaction REAL,
-                max_reaction REAL,
-                std_deviation REAL,
-                total_wrong INTEGER,
-                difficulty TEXT DEFAULT 'medium',
-                trials_data TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-        conn.commit()
+    """
+    Схема общая с клиентом: таблицы, индексы и триггеры user_stats вместе с
+    их версиями описаны в database.py — сервер применяет те же миграции.
+    """
+    Database(DB_NAME).close()
 
 
 init_db()
@@ -124,15 +102,18 @@ def save_session(data: SessionCreate):
         c.execute("""
             INSERT INTO sessions
             (user_id, avg_reaction, min_reaction, max_reaction,
-             std_deviation, total_wrong, difficulty, trials_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+             std_deviation, total_wrong, difficulty)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             user_id, data.avg_reaction, data.min_reaction, data.max_reaction,
-            data.std_deviation, data.total_wrong, data.difficulty,
-            json.dumps(data.trials_data, ensure_ascii=False)
+            data.std_deviation, data.total_wrong, data.difficulty
+        ))
+        session_id = c.lastrowid
+        c.executemany(INSERT_TRIALS_SQL, trial_rows(
+            session_id, [t for t in data.trials_data if isinstance(t, dict)]
         ))
         conn.commit()
-    return {"status": "ok", "session_id": c.lastrowid}
+    return {"status": "ok", "session_id": session_id}
 
 
 @app.get("/leaderboard", summary="Таблица лидеров с фильтрами")
@@ -156,23 +137,24 @@ def leaderboard(
         where_user.append("u.age IS NOT NULL AND u.age <= ?")
         params_user.append(age_to)
     if difficulty:
-        where_sess.append("s.difficulty = ?")
+        where_sess.append("st.difficulty = ?")
         params_sess.append(difficulty)
 
     user_cond = ("AND " + " AND ".join(where_user)) if where_user else ""
     sess_cond = ("AND " + " AND ".join(where_sess)) if where_sess else ""
 
+    # Итоги по пользователям ведут триггеры на sessions (database._schema_v4)
     sql = f"""
         SELECT
             u.username,
             u.age,
             u.gender,
-            AVG(s.avg_reaction)  AS avg_account,
-            COUNT(s.id)          AS sessions_count,
-            MIN(s.min_reaction)  AS best_ever,
-            SUM(CASE WHEN s.total_wrong = 0 THEN 1 ELSE 0 END) AS perfect_sessions
+            SUM(st.sum_avg) / NULLIF(SUM(st.avg_count), 0) AS avg_account,
+            SUM(st.sessions_count)   AS sessions_count,
+            MIN(st.best_ever)        AS best_ever,
+            SUM(st.perfect_sessions) AS perfect_sessions
         FROM users u
-        JOIN sessions s ON u.id = s.user_id
+        JOIN user_stats st ON u.id = st.user_id
         WHERE 1=1 {user_cond} {sess_cond}
         GROUP BY u.id
         ORDER BY avg_account ASC
@@ -0,0 +1,32 @@
+import time
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QLabel
+
+
+class StimulusLabel(QLabel):
+    """
+    QLabel стимула, который сообщает, когда стимул действительно отрисован.
+
+    После arm() первый paintEvent, нарисовавший новое содержимое, испускает
+    presented(perf_counter_ns) — синхронно, сразу после отрисовки, тем же
+    часами, что у кадров камеры и ReactionTrainer. Отсчёт реакции от этого
+    момента не зависит от того, когда Qt дошёл до перерисовки после смены
+    стиля и текста. Задержку композитора и монитора после отрисовки окна
+    отсюда не видно.
+    """
+
+    presented = Signal(object)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._armed = False
+
+    def arm(self):
+        """Следующая отрисовка — показ нового стимула."""
+        self._armed = True
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._armed:
+            self._armed = False
+            self.presented.emit(time.perf_counter_ns())
@@ -1,13 +1,38 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
     QPushButton, QProgressBar, QMessageBox, QSlider, QSizePolicy,
-    QFileDialog
+    QFileDialog, QComboBox
 )
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont, QImage, QPixmap
-import cv2
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QFont, QShortcut, QKeySequence
+import os
+import threading
+import time
+from datetime import datetime
 import styles
 from trainer_logic import DIFFICULTY_SETTINGS
+from camera_capture import CameraCapture
+from replay import VideoFileSource
+from video_view import frame_to_pixmap
+from stimulus_view import StimulusLabel
+from detection_worker import DetectionWorker
+from frame_scheduler import FrameScheduler
+from perf_stats import PipelineProfiler
+from gesture_filter import GestureFilter
+from motion_onset import MotionOnsetDetector
+from calibration import CalibrationRecorder
+import camera_probe
+from detector_config import detector_params
+
+
+# Диагностика производительности (для настройки на слабых киосках):
+#   NEUROSPRINT_PERF_OVERLAY=1      — сразу показывать оверлей (переключается F3)
+#   NEUROSPRINT_PERF_LOG=<папка>    — сохранять замеры в JSON по окончании сессии
+PERF_OVERLAY_DEFAULT = os.environ.get("NEUROSPRINT_PERF_OVERLAY") == "1"
+PERF_LOG_DIR = os.environ.get("NEUROSPRINT_PERF_LOG")
+
+# Размер окна видео; под него кадр масштабируется один раз, в потоке захвата
+VIDEO_SIZE = (440, 330)
 
 
 DIFF_STYLES = {
@@ -82,6 +107,13 @@ class DifficultyCard(QFrame):
 
 
 class TrainPage(QWidget):
+    # Приходят из фоновых потоков: итог CameraCapture.switch_device()
+    # и обновлённый кэш камер от camera_probe.refresh_cache()
+    camera_switched = Signal(bool)
+    cameras_found = Signal(dict)
+    # Итог CameraCapture.start_async(): (захват, открылась ли камера)
+    camera_opened = Signal(object, bool)
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -92,16 +124,40 @@ class TrainPage(QWidget):
         self._round_active = False
         self._last_gesture = None
         self._neutral_held = False     # держит ли пользователь нейтральный жест
+        self._script = None            # сценарий стимулов при воспроизведении записи
+        self._script_index = 0
+        self._calibration = None       # CalibrationRecorder, пока идёт калибровка жестов
+        self._gesture_filter = GestureFilter()
+        self._motion = MotionOnsetDetector()
         self._session_ended = False
         self._last_stats = None        # для PDF-экспорта
-        self.cap = None
+        self.capture = None
+        self._frame_ns = 0             # время захвата текущего кадра (perf_counter_ns)
+        self._last_lm_list = None      # последние точки руки от DetectionWorker
+        self._last_hand = None         # сторона руки, чьи точки в _last_lm_list
+        self._draw_landmarks = True    # рисовать ли точки руки (по уровню сложности)
         self.detector = None
+        self._worker = None
+        self.profiler = None
         self.trainer = None
+        # Найденные камеры и выбор пользователя (camera_cache.json)
+        self._camera_cache = camera_probe.load_cache()
+        self._probe_thread = None
+        self._pending_camera = None    # (индекс, бэкенд), на которые идёт переключение
+        self._opening = None           # (захват, калибровка ли), пока камера открывается
         self._build()
-        self._video_timer = QTimer()
-        self._video_timer.timeout.connect(self._update_frame)
+        # Кадры обрабатываются по мере поступления, частота зависит от фазы сессии
+        self._scheduler = FrameScheduler(preview_fps=10, parent=self)
+        self._scheduler.frame_ready.connect(self._update_frame)
         self._next_timer = QTimer()
         self._next_timer.timeout.connect(self._next_round)
+        self._perf_timer = QTimer()
+        self._perf_timer.timeout.connect(self._update_perf_overlay)
+        self._perf_shortcut = QShortcut(QKeySequence("F3"), self)
+        self._perf_shortcut.activated.connect(self._toggle_perf_overlay)
+        self.camera_switched.connect(self._on_camera_switched)
+        self.cameras_found.connect(self._on_cameras_found)
+        self.camera_opened.connect(self._on_camera_opened)
 
     def _build(self):
         root = QVBoxLayout(self)
@@ -235,6 +291,15 @@ class TrainPage(QWidget):
         self._start_btn.setStyleSheet(styles.BUTTON_PRIMARY)
         self._start_btn.clicked.connect(self._start_session)
         btn_row.addWidget(self._start_btn)
+        btn_row.addSpacing(12)
+
+        self._calib_btn = QPushButton("🖐 Калибровка жестов")
+        self._calib_btn.setCursor(Qt.PointingHandCursor)
+        self._calib_btn.setFixedHeight(54)
+        self._calib_btn.setStyleSheet(styles.BUTTON_SECONDARY)
+        self._calib_btn.setToolTip("Запомнить, как ты показываешь жесты — распознавание станет точнее")
+        self._calib_btn.clicked.connect(self._start_calibration)
+        btn_row.addWidget(self._calib_btn)
         btn_row.addStretch()
         idle.addLayout(btn_row)
 
@@ -257,9 +322,10 @@ class TrainPage(QWidget):
         stim_l = QVBoxLayout(self._stim_frame)
         stim_l.setAlignment(Qt.AlignCenter)
 
-        self._stim_label = QLabel("●")
+        self._stim_label = StimulusLabel("●")
         self._stim_label.setFont(QFont("Segoe UI", 80))
         self._stim_label.setAlignment(Qt.AlignCenter)
+        self._stim_label.presented.connect(self._on_stimulus_presented)
         stim_l.addWidget(self._stim_label)
 
         self._color_hint = QLabel("")
@@ -274,19 +340,46 @@ class TrainPage(QWidget):
         rl.setSpacing(12)
 
         self._video_label = QLabel()
-        self._video_label.setFixedSize(440, 330)
+        self._video_label.setFixedSize(*VIDEO_SIZE)
         self._video_label.setStyleSheet(
             f"background-color: #0F172A; border-radius: 14px; border: 2px solid {styles.COLORS['border']};"
         )
         self._video_label.setAlignment(Qt.AlignCenter)
         rl.addWidget(self._video_label)
 
+        # Оверлей замеров конвейера поверх видео (F3)
+        self._perf_label = QLabel(self._video_label)
+        self._perf_label.setFont(QFont("Consolas", 8))
+        self._perf_label.setStyleSheet(
+            "color: #A7F3D0; background-color: rgba(15,23,42,0.75); border-radius: 6px; padding: 4px;"
+        )
+        self._perf_label.move(8, 8)
+        self._perf_label.setVisible(PERF_OVERLAY_DEFAULT)
+
         self._hand_status = QLabel("Рука не обнаружена")
         self._hand_status.setFont(QFont("Segoe UI", 11))
         self._hand_status.setStyleSheet(f"color: {styles.COLORS['text_soft']};")
         self._hand_status.setAlignment(Qt.AlignCenter)
         rl.addWidget(self._hand_status)
 
+        # Смена камеры на ходу, без перезапуска сессии
+        self._camera_combo = QComboBox()
+        self._camera_combo.setStyleSheet(f"""
+            QComboBox {{
+                padding: 5px 10px;
+                border: 1.5px solid {styles.COLORS['border']};
+                border-radius: 8px;
+                background: white;
+                color: {styles.COLORS['text_dark']};
+                font-size: 12px;
+            }}
+            QComboBox:hover {{ border-color: {styles.COLORS['accent_yellow']}; }}
+            QComboBox::drop-down {{ border: none; width: 20px; }}
+        """)
+        self._camera_combo.activated.connect(self._on_camera_chosen)
+        rl.addWidget(self._camera_combo)
+        self._fill_camera_combo()
+
         stats_frame = QFrame()
         stats_frame.setStyleSheet(
             f"QFrame {{ background-color: white; border-radius: 12px; border: 1.5px solid {styles.COLORS['border']}; }}"
@@ -386,28 +479,230 @@ class TrainPage(QWidget):
     def _update_idle_hint(self):
         self.update_idle_hint()
 
+    def warm_up_detector(self):
+        """
+        Создаёт и прогревает общий детектор в фоне, чтобы первая сессия
+        не ждала инициализации MediaPipe и первые раунды не были медленнее остальных.
+        """
+        threading.Thread(target=self._warm_up_detector, name="DetectorWarmUp", daemon=True).start()
+
+    def _warm_up_detector(self):
+        import HandTracking as ht
+        diff = DIFFICULTY_SETTINGS[self._selected_difficulty]
+        cam = diff["camera"]
+        ht.shared_detector(warm_up=True, warm_up_size=(cam["width"], cam["height"]),
+                           **detector_params(diff))
+
+    def _user_classifier(self):
+        """
+        Персональный классификатор текущего пользователя (см. калибровку) или None.
+        Читается из БД один раз на старте сессии — в покадровой обработке БД не трогается.
+        """
+        user = self.main_window.current_user
+        if not user:
+            return None
+        data = self.db.get_calibration(user['id'])
+        if not data:
+            return None
+        from gesture_classifier import GestureClassifier
+        try:
+            return GestureClassifier.from_bytes(data)
+        except (OSError, KeyError, ValueError):
+            return None
+
     def _get_rounds(self):
         return self._slider.value()
 
+    # ─── Камеры ──────────────────────────────────────────────────────
+    def probe_cameras(self, force=False):
+        """
+        Ищет камеры в фоне и обновляет список выбора. Без force — только если
+        кэш пуст или устарел: иначе камера открывается по кэшу, без перебора.
+        Открытая сейчас камера не перебирается.
+        """
+        if self._probe_thread and self._probe_thread.is_alive():
+            return
+        if not force and camera_probe.cache_is_fresh(self._camera_cache):
+            return
+        exclude = self.capture.device if self.capture and not self._script else None
+        self._probe_thread = threading.Thread(
+            target=lambda: self.cameras_found.emit(camera_probe.refresh_cache(exclude)),
+            name="CameraProbe", daemon=True)
+        self._probe_thread.start()
+
+    def _on_cameras_found(self, cache):
+        # Кэш берётся целиком (со свежим probed_at); выбор, сделанный пока шёл
+        # перебор, важнее прочитанного перебором с диска
+        selected = self._camera_cache.get("selected")
+        self._camera_cache = cache
+        if selected and selected != cache.get("selected"):
+            self._save_camera_choice(selected["index"], selected.get("backend"))
+        self._fill_camera_combo()
+
+    def _selected_camera(self):
+        """(индекс устройства, бэкенд) выбранной камеры; без кэша — камера 0 и бэкенд по умолчанию."""
+        selected = self._camera_cache.get("selected")
+        if selected:
+            return selected["index"], selected.get("backend")
+        cameras = self._camera_cache["cameras"]
+        if cameras:
+            return cameras[0]["index"], cameras[0]["backend"]
+        return 0, None
+
+    def _fill_camera_combo(self):
+        current = self._selected_camera()
+        self._camera_combo.blockSignals(True)
+        self._camera_combo.clear()
+        self._camera_choices = [(cfg["index"], cfg["backend"]) for cfg in self._camera_cache["cameras"]]
+        for cfg in self._camera_cache["cameras"]:
+            self._camera_combo.addItem(camera_probe.camera_label(cfg))
+        if not self._camera_choices:
+            # Камеры ещё не искали — показываем ту, что откроется
+            self._camera_choices = [current]
+            self._camera_combo.addItem(f"Камера {current[0]}")
+        i = self._camera_choices.index(current) if current in self._camera_choices else 0
+        self._camera_combo.setCurrentIndex(i)
+        self._camera_combo.blockSignals(False)
+
+    def _save_camera_choice(self, index, backend):
+        self._camera_cache["selected"] = {"index": index, "backend": backend}
+        camera_probe.save_cache(self._camera_cache)
+
+    def _on_camera_chosen(self, i):
+        index, backend = self._camera_choices[i]
+        if not isinstance(self.capture, CameraCapture) or self._script or not self._session_active:
+            self._save_camera_choice(index, backend)
+            return
+        if (index, backend) == (self.capture.device, self.capture.backend):
+            return
+        if self._round_active:
+            # Во время раунда смена камеры исказила бы время реакции
+            self._fill_camera_combo()
+            self._hand_status.setText("Камеру можно сменить между раундами")
+            return
+        self._camera_combo.setEnabled(False)
+        self._pending_camera = (index, backend)
+        self.capture.switch_device(index, backend, on_done=self.camera_switched.emit)
+
+    def _on_camera_switched(self, ok):
+        self._camera_combo.setEnabled(True)
+        if not self._session_active:
+            return
+        if not ok:
+            self._fill_camera_combo()
+            QMessageBox.warning(self, "Камера", "Не удалось открыть выбранную камеру — остаёмся на прежней.")
+            # Список камер мог устареть
+            self.probe_cameras(force=True)
+            return
+        self._save_camera_choice(*self._pending_camera)
+        # Кадры с новой камеры не продолжают движение руки со старой
+        self._gesture_filter.reset()
+        self._motion.reset()
+        self._last_lm_list = None
+        self._last_hand = None
+        if self.detector:
+            self.detector.reset_roi()
+
     # ─── Тренировка ───────────────────────────────────────────────────
+    def _open_camera(self, calibration=False):
+        """
+        Открывает выбранную камеру в фоне (CameraCapture.start_async) — GUI не
+        ждёт драйвер; сессия начнётся в _on_camera_opened.
+        """
+        if self._opening:
+            return
+        diff = DIFFICULTY_SETTINGS[self._selected_difficulty]
+        cam = diff["camera"]
+        self.profiler = PipelineProfiler()
+        index, backend = self._selected_camera()
+        capture = CameraCapture(index, width=cam["width"], height=cam["height"], fps=cam["fps"],
+                                mirror=True, display_size=VIDEO_SIZE, profiler=self.profiler,
+                                backend=backend)
+        self._opening = (capture, calibration)
+        self._start_btn.setEnabled(False)
+        self._calib_btn.setEnabled(False)
+        capture.start_async(lambda ok: self.camera_opened.emit(capture, ok))
+
+    def _on_camera_opened(self, capture, ok):
+        if not self._opening or self._opening[0] is not capture:
+            capture.stop()
+            return
+        _, calibration = self._opening
+        self._opening = None
+        self._start_btn.setEnabled(True)
+        self._calib_btn.setEnabled(True)
+        if not ok:
+            if self._probe_thread and self._probe_thread.is_alive():
+                QMessageBox.warning(self, "Камера", "Идёт поиск камер — попробуй ещё раз через пару секунд.")
+            else:
+                QMessageBox.critical(self, "Ошибка", "Камера не найдена.")
+                # Камера из кэша не открылась — ищем камеры заново
+                self.probe_cameras(force=True)
+            return
+
+        self._script = None
+        if calibration:
+            self._calibration = CalibrationRecorder()
+            self._begin_session(capture, self._selected_difficulty, len(self._calibration.poses))
+        else:
+            self._calibration = None
+            self._begin_session(capture, self._selected_difficulty, self._get_rounds())
+
     def _start_session(self):
-        import HandTracking as ht
-        from trainer_logic import ReactionTrainer
+        self._open_camera()
 
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            QMessageBox.critical(self, "Ошибка", "Камера не найдена.")
+    def _start_calibration(self):
+        """Запись поз пользователя для персонального классификатора жестов."""
+        if not self.main_window.current_user:
+            QMessageBox.information(self, "Калибровка", "Войди в профиль — калибровка сохраняется для пользователя.")
             return
+        self._open_camera(calibration=True)
+
+    def start_replay(self, video_path, script):
+        """
+        Запускает сессию по записанному видео и сценарию стимулов
+        (см. replay.load_stimulus_script). Кадры идут в темпе записи, раунды
+        показываются в моменты из сценария, результат в БД не сохраняется.
+        """
+        self.profiler = PipelineProfiler()
+        capture = VideoFileSource(video_path, speed="native", mirror=script["mirror"],
+                                  display_size=VIDEO_SIZE, profiler=self.profiler)
+        if not capture.start():
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть видео:\n{video_path}")
+            return
+
+        self._script = script
+        self._script_index = 0
+        self._calibration = None
+        self._select_difficulty(script["difficulty"])
+        self._begin_session(capture, script["difficulty"], len(script["rounds"]))
+
+    def _begin_session(self, capture, difficulty, max_trials):
+        import HandTracking as ht
+        from trainer_logic import ReactionTrainer
 
-        max_trials = self._get_rounds()
-        self.trainer = ReactionTrainer(difficulty=self._selected_difficulty, max_trials=max_trials)
-        self.detector = ht.HandDetector()
+        diff = DIFFICULTY_SETTINGS[difficulty]
+        self.capture = capture
+        self._draw_landmarks = diff["draw_landmarks"]
+        self.trainer = ReactionTrainer(difficulty=difficulty, max_trials=max_trials)
+        # Общий детектор уже прогрет при старте приложения (warm_up_detector).
+        # Прогон записи не зависит от пользователя — без его калибровки
+        classifier = None if self._script or self._calibration else self._user_classifier()
+        self.detector = ht.shared_detector(**detector_params(diff, classifier))
+        self._worker = DetectionWorker(self.detector, profiler=self.profiler,
+                                       target_fps=capture.actual_fps or diff["camera"]["fps"])
+        self._worker.result_ready.connect(self._on_detection)
+        self._worker.start()
+        capture.on_frame = self._scheduler.notify_frame
+        self._last_lm_list = None
+        self._last_hand = None
         self._session_active = True
         self._session_ended = False
         self._waiting = False
         self._round_active = False
         self._last_gesture = None
-        self._last_processed_gesture = None
+        self._gesture_filter.reset()
+        self._motion.reset()
         self._neutral_held = False
 
         self._progress_bar.setMaximum(max_trials)
@@ -418,10 +713,32 @@ class TrainPage(QWidget):
 
         self._idle_widget.hide()
         self._active_widget.show()
-        self._video_timer.start(15)
+        self._camera_combo.setVisible(not self._script)
+        self._camera_combo.setEnabled(True)
+        if self._script or self._calibration:
+            # Раунды по сценарию привязаны ко времени записи, а калибровке
+            # нужно как можно больше кадров — обрабатываем каждый кадр
+            self._scheduler.set_mode(FrameScheduler.ACTIVE)
+        else:
+            self._scheduler.set_mode(FrameScheduler.PREVIEW)
+        if self._perf_label.isVisible():
+            self._perf_timer.start(500)
+        if self._calibration:
+            self._show_calibration_step()
+            return
         self._show_neutral_hint()
-        # Даём 1.5 сек на подготовку, затем ждём нейтральный жест
-        QTimer.singleShot(1500, self._wait_for_neutral_then_start)
+        if self._script:
+            # По сценарию раунды идут по времени записи, без ожидания нейтрали
+            self._waiting_for_neutral = False
+            self._schedule_scripted_round()
+        else:
+            # Даём 1.5 сек на подготовку, затем ждём нейтральный жест
+            QTimer.singleShot(1500, self._wait_for_neutral_then_start)
+
+    def _schedule_scripted_round(self):
+        at_ns = self._script["rounds"][self._script_index]["at_ns"]
+        delay_ms = max(0, (at_ns - self.capture.video_ns()) // 1_000_000)
+        self._next_timer.start(int(delay_ms))
 
     def _wait_for_neutral_then_start(self):
         """Запускаем первый раунд только после того, как пользователь примет нейтральный жест."""
@@ -429,18 +746,35 @@ class TrainPage(QWidget):
         # Проверка нейтрального жеста идёт в _update_frame
         self._waiting_for_neutral = True
 
+    def _finish_session(self):
+        """Останавливает конвейер и через паузу показывает результаты."""
+        self._session_ended = True
+        self._next_timer.stop()
+        self._stop_pipeline()
+        QTimer.singleShot(400, lambda: self._end_session(aborted=False))
+
+    def _stop_pipeline(self):
+        """Останавливает обработку кадров, поток захвата и поток распознавания."""
+        self._scheduler.stop()
+        self._perf_timer.stop()
+        if self.capture:
+            self.capture.stop()
+            self.capture = None
+        if self._worker:
+            self._worker.stop()
+            self._worker = None
+
     def _end_session(self, aborted=False):
-        self._video_timer.stop()
         self._next_timer.stop()
+        self._stop_pipeline()
         self._session_active = False
         self._session_ended = True
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        self._dump_perf_log()
         if not aborted and self.trainer:
             stats, trials_data = self.trainer.reset_session()
             user = self.main_window.current_user
-            if user:
+            # Прогон записи — не тренировка пользователя, в профиль не пишем
+            if user and not self._script:
                 self.db.save_session(user['id'], stats, trials_data)
             self._last_stats = stats
             self._show_results(stats)
@@ -482,6 +816,8 @@ class TrainPage(QWidget):
             f"⚡  Лучшее время реакции: {stats['min_reaction']:.2f} мс\n"
             f"📈  Вариативность: ±{stats['std_deviation']:.2f} мс"
         )
+        if stats.get('avg_movement_onset'):
+            msg.setText(msg.text() + f"\n🖐  Начало движения: {stats['avg_movement_onset']:.2f} мс")
 
         pdf_btn = msg.addButton("📄 Экспорт в PDF", QMessageBox.ActionRole)
         ok_btn  = msg.addButton("В профиль →",     QMessageBox.AcceptRole)
@@ -502,21 +838,95 @@ class TrainPage(QWidget):
             f"color: {styles.COLORS['text_mid']}; font-size: 14px; font-weight: bold;"
         )
 
+    # ─── Калибровка жестов ───────────────────────────────────────────
+    def _update_calibration(self, result):
+        rec = self._calibration
+        step, phase = rec.step, rec.phase
+        rec.update(result["lm_norm"], -1.0 if result["hand"] == "Right" else 1.0, self._frame_ns)
+        if rec.done:
+            self._finish_calibration()
+        elif (rec.step, rec.phase) != (step, phase):
+            self._show_calibration_step()
+
+    def _show_calibration_step(self):
+        rec = self._calibration
+        emoji_map = {"neutral": "☝️", "rock": "✊", "scissors": "✌️", "paper": "🖐️"}
+        self._reset_round_style()
+        self._stim_label.setFont(QFont("Segoe UI Emoji", 100))
+        self._stim_label.setText(emoji_map[rec.pose])
+        if rec.phase == "prepare":
+            self._color_hint.setText("Приготовься: покажи этот жест")
+            color = styles.COLORS['text_mid']
+        else:
+            self._color_hint.setText("🔴 Запись — держи жест, слегка поворачивая руку")
+            color = styles.COLORS['accent_red']
+        self._color_hint.setStyleSheet(f"color: {color}; font-size: 14px; font-weight: bold;")
+        self._progress_bar.setValue(rec.step)
+        self._progress_lbl[1].setText(f"{rec.step} / {len(rec.poses)}")
+
+    def _finish_calibration(self):
+        rec = self._calibration
+        self._calibration = None
+        self._session_ended = True
+        self._stop_pipeline()
+        self._session_active = False
+        self._active_widget.hide()
+        self._idle_widget.show()
+        self._update_idle_hint()
+
+        user = self.main_window.current_user
+        try:
+            model = rec.fit()
+        except ValueError as e:
+            QMessageBox.warning(self, "Калибровка", f"Калибровка не удалась:\n{e}")
+            return
+        if user:
+            self.db.save_calibration(user['id'], model.to_bytes())
+        QMessageBox.information(self, "Калибровка", "✅ Калибровка сохранена — она будет использоваться в тренировках.")
+
     # ─── Кадры камеры ────────────────────────────────────────────────
     def _update_frame(self):
-        if not self.cap or not self.cap.isOpened():
+        if not self.capture:
             return
-        ret, frame = self.cap.read()
-        if not ret:
+        # Кадр читается в потоке захвата; здесь только забираем свежий, не блокируясь
+        latest = self.capture.read_latest()
+        # Запись закончилась раньше сценария. Уведомление о конце могло прийти
+        # вместе с последним кадром, поэтому проверяем до чтения кадра
+        finished = getattr(self.capture, "finished", False)
+        if latest is None:
+            if finished and not self._session_ended:
+                self._finish_session()
             return
-
-        # Отзеркаливаем по горизонтали — движение руки совпадает с реальным
-        frame = cv2.flip(frame, 1)
-        frame    = self.detector.find_hands(frame)
-        lm_list  = self.detector.find_position(frame)
-
-        if lm_list:
-            gesture = self.detector.recognize_gesture()
+        # Кадр уже отзеркален, а display — уменьшен до размера видео, в потоке захвата
+        frame, display, frame_ns, _ = latest
+
+        # Распознавание идёт в DetectionWorker, результат придёт в _on_detection
+        self._worker.submit(frame, frame_ns)
+        with self.profiler.measure("draw"):
+            self._draw_frame(display, frame.shape[1])
+        self.profiler.tick("display")
+        if finished and not self._session_ended:
+            self._finish_session()
+
+    def _on_detection(self, result):
+        if not self._session_active or self._session_ended:
+            return
+        self._frame_ns = result["frame_ns"]
+        # Полная задержка: от захвата кадра до обработки жеста в GUI
+        self.profiler.record("end_to_end", time.perf_counter_ns() - self._frame_ns)
+        self._scheduler.report_detection(result["detect_ns"])
+        self._last_lm_list = result["lm_list"]
+        # Покадровый жест сглаживается: дальше работаем с устойчивым жестом
+        onset = self._gesture_filter.update(result["gesture"], self._frame_ns)
+        gesture = self._gesture_filter.stable
+        # Скорость кончиков пальцев → момент начала движения руки.
+        # Отвечающая рука сменилась — скорость между разными руками не считаем
+        if result["hand"] != self._last_hand:
+            self._motion.update(None, self._frame_ns)
+            self._last_hand = result["hand"]
+        self._motion.update(self._last_lm_list, self._frame_ns)
+
+        if self._last_lm_list is not None:
             # Статус руки
             if gesture == "neutral":
                 self._hand_status.setText("☝️ Нейтральный жест")
@@ -529,10 +939,13 @@ class TrainPage(QWidget):
                 self._hand_status.setText("✋ Рука видна")
                 self._hand_status.setStyleSheet(f"color: {styles.COLORS['text_mid']};")
         else:
-            gesture = "unknown"
             self._hand_status.setText("Рука не видна")
             self._hand_status.setStyleSheet(f"color: {styles.COLORS['text_soft']};")
 
+        if self._calibration:
+            self._update_calibration(result)
+            return
+
         # ── Ждём нейтральный жест перед первым/следующим раундом ──
         if hasattr(self, '_waiting_for_neutral') and self._waiting_for_neutral:
             if gesture == "neutral":
@@ -540,71 +953,100 @@ class TrainPage(QWidget):
                     self._neutral_held = True
                     # Нейтральный взят — запускаем раунд через небольшую паузу
                     self._waiting_for_neutral = False
+                    # До стимула детектор должен выйти на полную частоту:
+                    # фильтр жестов и детектор движения набирают историю заранее
+                    self._scheduler.set_mode(FrameScheduler.ACTIVE)
                     delay = self.trainer.get_delay()
                     self._next_timer.start(int(delay * 1000))
             else:
                 self._neutral_held = False
             # Пока ждём нейтраль — не обрабатываем жесты для раунда
-            self._draw_frame(frame)
             return
 
         # ── Активный раунд: ждём ответного жеста ──────────────────
+        # Засчитываем только НАЧАЛО устойчивого жеста (onset) из GestureFilter:
+        # - удерживаемый жест не засчитывается многократно;
+        # - одиночный шумный кадр не даёт ошибку;
+        # - исправлять ошибки можно сменой жеста без возврата в нейтраль.
         if self._round_active and self._waiting and not self._session_ended:
-            if gesture in ("rock", "scissors", "paper"):
-                # Засчитываем жест только если он ИЗМЕНИЛСЯ по сравнению с последним
-                # обработанным жестом. Это позволяет:
-                # - не засчитывать один удерживаемый жест многократно
-                # - исправлять ошибки любое количество раз без возврата в нейтраль
-                # Нейтраль и unknown сбрасывают блокировку → готов к новому жесту.
-                if gesture != self._last_processed_gesture:
-                    self._last_processed_gesture = gesture
-                    correct, reaction, _ = self.trainer.check_response(gesture)
-                    if correct:
-                        self._last_processed_gesture = None
-                        self._waiting = False
-                        self._round_active = False
-                        self._reset_round_frame()
-                        self._update_stats()
-                        if self.trainer.is_session_complete():
-                            self._session_ended = True
-                            self._next_timer.stop()
-                            self._video_timer.stop()
-                            if self.cap:
-                                self.cap.release()
-                                self.cap = None
-                            QTimer.singleShot(400, lambda: self._end_session(aborted=False))
-                        else:
-                            self._show_neutral_hint()
-                            self._waiting_for_neutral = True
-                            self._neutral_held = False
+            if onset and onset["gesture"] in ("rock", "scissors", "paper"):
+                correct, reaction, status = self.trainer.check_response(
+                    onset["gesture"], onset["frame_ns"], movement_ns=self._motion.onset_ns
+                )
+                if correct:
+                    self._waiting = False
+                    self._round_active = False
+                    self._reset_round_frame()
+                    self._update_stats()
+                    if self.trainer.is_session_complete():
+                        self._finish_session()
+                    elif self._script:
+                        self._script_index += 1
+                        self._schedule_scripted_round()
                     else:
-                        self._wrong_lbl[1].setText(f"❌ {self.trainer.total_wrong_in_session}")
-                        # Оставляем _last_processed_gesture = gesture.
-                        # Смена на любой другой жест → сразу засчитается.
-            elif gesture in ("neutral", "unknown"):
-                # Сброс блокировки: теперь любой следующий жест засчитается
-                self._last_processed_gesture = None
-
-        self._draw_frame(frame)
-
-    def _draw_frame(self, frame):
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
-        qt_img = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
-        self._video_label.setPixmap(
-            QPixmap.fromImage(qt_img).scaled(440, 330, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        )
+                        self._show_neutral_hint()
+                        self._waiting_for_neutral = True
+                        self._neutral_held = False
+                        self._scheduler.set_mode(FrameScheduler.PREVIEW)
+                elif status == "early":
+                    # Серия началась до показа стимула — ждём onset по свежим кадрам
+                    self._gesture_filter.rearm()
+                elif status == "wrong":
+                    self._wrong_lbl[1].setText(f"❌ {self.trainer.total_wrong_in_session}")
+
+    def _draw_frame(self, display, source_width):
+        """
+        display — кадр, уже уменьшенный под _video_label потоком захвата; он
+        принадлежит только GUI, поэтому точки руки рисуются прямо на нём,
+        а в QImage он уходит как BGR без cvtColor и без повторного масштабирования.
+        """
+        if self._draw_landmarks:
+            scale = display.shape[1] / source_width
+            self.detector.draw_position(display, self._last_lm_list, scale=scale)
+        self._video_label.setPixmap(frame_to_pixmap(display))
+
+    # ─── Замеры производительности ───────────────────────────────────
+    def _toggle_perf_overlay(self):
+        visible = not self._perf_label.isVisible()
+        self._perf_label.setVisible(visible)
+        if visible and self._session_active:
+            self._update_perf_overlay()
+            self._perf_timer.start(500)
+        else:
+            self._perf_timer.stop()
+
+    def _update_perf_overlay(self):
+        if not self.profiler:
+            return
+        self._perf_label.setText("stage        p50    p95    p99 (мс)\n" + self.profiler.overlay_text())
+        self._perf_label.adjustSize()
+
+    def _dump_perf_log(self):
+        if not PERF_LOG_DIR or not self.profiler:
+            return
+        try:
+            os.makedirs(PERF_LOG_DIR, exist_ok=True)
+            path = os.path.join(PERF_LOG_DIR, f"perf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            self.profiler.dump_json(path, extra={
+                "difficulty": self._selected_difficulty,
+                "finished_at": datetime.now().isoformat(),
+            })
+        except OSError:
+            pass
 
     # ─── Раунды ──────────────────────────────────────────────────────
     def _next_round(self):
         if self._session_ended:
             return
         self._next_timer.stop()
-        gesture, color = self.trainer.generate_round()
+        if self._script:
+            r = self._script["rounds"][self._script_index]
+            gesture, color = self.trainer.generate_round(r["gesture"], r["color"])
+        else:
+            gesture, color = self.trainer.generate_round()
         emoji_map = {"rock": "🪨", "scissors": "✂️", "paper": "🧻"}
         # Начальное состояние нового раунда
         self._last_gesture = None
-        self._last_processed_gesture = None
         self._waiting = True
         self._round_active = True
 
@@ -624,6 +1066,20 @@ class TrainPage(QWidget):
         self._stim_label.setText(emoji_map[gesture])
         self._color_hint.setText(hint_text)
         self._color_hint.setStyleSheet(f"color: {hint_color}; font-size: 14px; font-weight: bold;")
+        # Отсчёт реакции начнётся с отрисовки стимула (_on_stimulus_presented);
+        # рисуем синхронно, не дожидаясь очередного прохода цикла событий
+        self._stim_label.arm()
+        self._stim_frame.repaint()
+
+    def _on_stimulus_presented(self, presented_ns):
+        if not self._round_active or not self.trainer:
+            return
+        self.trainer.mark_presented(presented_ns)
+        # Жест, удерживаемый к показу стимула, должен дать новый onset
+        if self._gesture_filter.stable in ("rock", "scissors", "paper"):
+            self._gesture_filter.rearm()
+        # Задержка отрисовки по раундам — в оверлее и логе замеров
+        self.profiler.record("present", presented_ns - self.trainer.start_ticks)
 
     # Псевдоним для совместимости
     def _next_stimulus(self):
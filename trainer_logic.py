@@ -11,6 +11,10 @@ DIFFICULTY_SETTINGS = {
         "delay_max": 5.0,
         "description": "80% зелёных, 20% красных раундов",
         "green_ratio": 0.80,   # вероятность зелёного раунда
+        # Параметры камеры и размер кадра, который уходит в MediaPipe (ширина, px)
+        "camera": {"width": 640, "height": 480, "fps": 30},
+        "inference_width": 480,
+        "draw_landmarks": True,   # рисовать точки руки поверх видео
     },
     "medium": {
         "label": "Средний",
@@ -19,6 +23,9 @@ DIFFICULTY_SETTINGS = {
         "delay_max": 3.5,
         "description": "65% зелёных, 35% красных раундов",
         "green_ratio": 0.65,
+        "camera": {"width": 640, "height": 480, "fps": 30},
+        "inference_width": 384,
+        "draw_landmarks": True,   # рисовать точки руки поверх видео
     },
     "hard": {
         "label": "Сложный",
@@ -27,6 +34,10 @@ DIFFICULTY_SETTINGS = {
         "delay_max": 2.0,
         "description": "50% зелёных, 50% красных раундов",
         "green_ratio": 0.50,
+        "camera": {"width": 640, "height": 480, "fps": 60},
+        "inference_width": 320,
+        # На сложном уровне отрисовка не отнимает время у распознавания
+        "draw_landmarks": False,
     }
 }
 
@@ -40,7 +51,10 @@ class ReactionTrainer:
         self.current_round = None        # жест текущего раунда
         self.round_color = None          # цвет текущего раунда
         self.start_ticks = 0
-        self.reaction_times = []
+        self.presented_ticks = None      # когда стимул реально отрисован
+        self.reaction_times = []         # скорректированные (от показа до захвата кадра)
+        self.raw_reaction_times = []     # «сырые» (от генерации до распознавания)
+        self.movement_onsets = []        # от показа стимула до начала движения руки
         self.wrong_attempts = 0
         self.total_wrong_in_session = 0
         self.total_rounds_presented = 0
@@ -63,25 +77,73 @@ class ReactionTrainer:
         s = self.diff_settings
         return random.uniform(s["delay_min"], s["delay_max"])
 
-    def generate_round(self):
-        """Генерирует новый раунд с учётом соотношения зелёный/красный."""
-        self.current_round = random.choice(self.gestures)
-        green_ratio = self.diff_settings.get("green_ratio", 0.5)
-        self.round_color = "green" if random.random() < green_ratio else "red"
+    def generate_round(self, gesture=None, color=None, start_ns=None):
+        """
+        Генерирует новый раунд с учётом соотношения зелёный/красный.
+        gesture/color/start_ns задаются явно при воспроизведении записи
+        по сценарию стимулов (replay.py).
+        """
+        self.current_round = gesture or random.choice(self.gestures)
+        if color is None:
+            green_ratio = self.diff_settings.get("green_ratio", 0.5)
+            color = "green" if random.random() < green_ratio else "red"
+        self.round_color = color
         self.wrong_attempts = 0
-        self.start_ticks = time.perf_counter_ns()
+        self.start_ticks = start_ns if start_ns is not None else time.perf_counter_ns()
+        self.presented_ticks = None
         self.total_rounds_presented += 1
         return self.current_round, self.round_color
 
+    def mark_presented(self, presented_ns=None):
+        """
+        Фиксирует момент, когда стимул фактически появился на экране.
+        От него (а не от generate_round) отсчитывается скорректированная реакция.
+        """
+        self.presented_ticks = presented_ns if presented_ns is not None else time.perf_counter_ns()
+
+    def presentation_delay_ms(self):
+        """От запуска отсчёта (generate_round) до отрисовки стимула, мс; None — отрисовка не отмечена."""
+        if self.presented_ticks is None:
+            return None
+        return round((self.presented_ticks - self.start_ticks) / 1_000_000, 2)
+
     # Оставляем псевдоним для обратной совместимости
     def generate_stimulus(self):
         return self.generate_round()
 
-    def check_response(self, user_gesture):
+    def check_response(self, user_gesture, capture_ns=None, movement_ns=None, recognized_ns=None):
+        """
+        capture_ns — время захвата кадра (perf_counter_ns), на котором распознан жест.
+        Скорректированная реакция = захват кадра − показ стимула: в неё не входят
+        буферизация камеры, конвертация цвета, инференс MediaPipe и джиттер таймеров.
+        Сырая реакция (от generate_round до момента распознавания) сохраняется рядом.
+
+        movement_ns — время начала движения руки (MotionOnsetDetector). Если оно
+        попало между показом стимула и жестом, реакция делится на время начала
+        движения (movement_onset) и время выполнения жеста (movement_time).
+
+        recognized_ns — момент распознавания (по умолчанию «сейчас»); задаётся
+        при воспроизведении записи, чтобы результат не зависел от скорости машины.
+        """
         if user_gesture == "unknown":
             return False, 0, "unknown"
 
-        reaction_ms = round((time.perf_counter_ns() - self.start_ticks) / 1_000_000, 2)
+        now_ns = recognized_ns if recognized_ns is not None else time.perf_counter_ns()
+        if capture_ns is None:
+            capture_ns = now_ns
+        stimulus_ns = self.presented_ticks if self.presented_ticks is not None else self.start_ticks
+
+        # Кадр снят до появления стимула — это не ответ на текущий раунд
+        if capture_ns < stimulus_ns:
+            return False, 0, "early"
+
+        reaction_ms = round((capture_ns - stimulus_ns) / 1_000_000, 2)
+        raw_reaction_ms = round((now_ns - self.start_ticks) / 1_000_000, 2)
+
+        movement_onset_ms = movement_time_ms = None
+        if movement_ns is not None and stimulus_ns <= movement_ns <= capture_ns:
+            movement_onset_ms = round((movement_ns - stimulus_ns) / 1_000_000, 2)
+            movement_time_ms = round(reaction_ms - movement_onset_ms, 2)
 
         winning_gesture = next(g for g, b in self.beats.items() if b == self.current_round)
         losing_gesture  = self.beats[self.current_round]
@@ -91,11 +153,18 @@ class ReactionTrainer:
             self.trials_completed += 1
             self.correct_responses += 1
             self.reaction_times.append(reaction_ms)
+            self.raw_reaction_times.append(raw_reaction_ms)
+            if movement_onset_ms is not None:
+                self.movement_onsets.append(movement_onset_ms)
             self.session_data["trials"].append({
                 "round_gesture": self.current_round,
                 "color": self.round_color,
                 "response": user_gesture,
                 "reaction_time": reaction_ms,
+                "reaction_time_raw": raw_reaction_ms,
+                "movement_onset": movement_onset_ms,
+                "movement_time": movement_time_ms,
+                "presentation_delay": self.presentation_delay_ms(),
                 "wrong_attempts": self.wrong_attempts,
                 "timestamp": datetime.now().isoformat()
             })
@@ -112,6 +181,8 @@ class ReactionTrainer:
                 "min_reaction": 0.0,
                 "max_reaction": 0.0,
                 "std_deviation": 0.0,
+                "avg_reaction_raw": 0.0,
+                "avg_movement_onset": 0.0,
                 "total_wrong": self.total_wrong_in_session,
                 "trials_completed": self.trials_completed,
                 "total_trials": self.max_trials,
@@ -127,6 +198,9 @@ class ReactionTrainer:
             "min_reaction": round(min(self.reaction_times), 2),
             "max_reaction": round(max(self.reaction_times), 2),
             "std_deviation": round(std_dev, 2),
+            "avg_reaction_raw": round(sum(self.raw_reaction_times) / len(self.raw_reaction_times), 2),
+            "avg_movement_onset": (round(sum(self.movement_onsets) / len(self.movement_onsets), 2)
+                                   if self.movement_onsets else 0.0),
             "total_wrong": self.total_wrong_in_session,
             "trials_completed": self.trials_completed,
             "total_trials": self.max_trials,
@@ -3,14 +3,16 @@ from PySide6.QtWidgets import (
     QLabel, QFrame, QProgressBar, QPushButton, QMessageBox
 )
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont, QImage, QPixmap
-import cv2
+from PySide6.QtGui import QFont
 import time
 import random
 import styles
 import HandTracking as ht
 from trainer_logic import ReactionTrainer
 from database import Database
+from camera_capture import CameraCapture
+from stimulus_view import StimulusLabel
+from video_view import frame_to_pixmap
 
 
 class TrainerWindow(QMainWindow):
@@ -23,9 +25,9 @@ class TrainerWindow(QMainWindow):
 
         self.trainer = ReactionTrainer()
         self.detector = ht.HandDetector()
-        self.cap = cv2.VideoCapture(0)
+        self.capture = CameraCapture(0, display_size=(480, 360))
 
-        if not self.cap.isOpened():
+        if not self.capture.start():
             QMessageBox.critical(self, "Ошибка", "Камера не найдена")
             return
 
@@ -50,7 +52,8 @@ class TrainerWindow(QMainWindow):
         left_layout = QVBoxLayout(self.left)
         left_layout.setAlignment(Qt.AlignCenter)
 
-        self.stimulus = QLabel("●")
+        self.stimulus = StimulusLabel("●")
+        self.stimulus.presented.connect(self.on_stimulus_presented)
         self.stimulus.setFont(QFont("Segoe UI", 100))
         self.stimulus.setAlignment(Qt.AlignCenter)
         left_layout.addWidget(self.stimulus)
@@ -97,23 +100,19 @@ class TrainerWindow(QMainWindow):
         self.next_timer.timeout.connect(self.next_stimulus)
 
     def update_frame(self):
-        if self.session_ended:
-            ret, frame = self.cap.read()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                qt_img = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
-                self.video.setPixmap(QPixmap.fromImage(qt_img).scaled(480, 360, Qt.KeepAspectRatio))
+        latest = self.capture.read_latest()
+        if latest is None:
             return
+        frame, display, self.frame_ns, _ = latest
 
-        ret, frame = self.cap.read()
-        if not ret:
+        if self.session_ended:
+            self.video.setPixmap(frame_to_pixmap(display))
             return
 
-        frame = self.detector.find_hands(frame)
+        self.detector.find_hands(frame, draw=False)
         lm_list = self.detector.find_position(frame)
 
-        if lm_list:
+        if lm_list is not None:
             self.hand_status.setText("Рука обнаружена")
             gesture = self.detector.recognize_gesture()
         else:
@@ -129,7 +128,7 @@ class TrainerWindow(QMainWindow):
                 elif gesture != self.last_gesture:
                     self.last_gesture = gesture
 
-                    correct, reaction, _ = self.trainer.check_response(gesture)
+                    correct, reaction, _ = self.trainer.check_response(gesture, self.frame_ns)
 
                     if correct:
                         self.waiting = False
@@ -150,10 +149,8 @@ class TrainerWindow(QMainWindow):
                         self.wrong_count = self.trainer.total_wrong_in_session
                         self.wrong_label.setText(f"❌ {self.wrong_count}")
 
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame.shape
-        qt_img = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
-        self.video.setPixmap(QPixmap.fromImage(qt_img).scaled(480, 360, Qt.KeepAspectRatio))
+        self.detector.draw_position(display, lm_list, scale=display.shape[1] / frame.shape[1])
+        self.video.setPixmap(frame_to_pixmap(display))
 
     def show_waiting_state(self):
         self.set_waiting_background()
@@ -181,6 +178,12 @@ class TrainerWindow(QMainWindow):
         self.set_colored_background(color)
         self.stimulus.setFont(QFont("Segoe UI Emoji", 180))
         self.stimulus.setText(emoji_map[gesture])
+        self.stimulus.arm()
+        self.left.repaint()
+
+    def on_stimulus_presented(self, presented_ns):
+        if self.stimulus_active:
+            self.trainer.mark_presented(presented_ns)
 
     def set_waiting_background(self):
         self.left.setStyleSheet("""
@@ -275,5 +278,5 @@ class TrainerWindow(QMainWindow):
         self.close()
 
     def closeEvent(self, event):
-        self.cap.release()
+        self.capture.stop()
         event.accept()
\ No newline at end of file
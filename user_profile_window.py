@@ -9,6 +9,12 @@ import styles
 from database import Database
 
 
+# Тренировки в таблице подгружаются страницами (кнопка «Показать ещё»)
+SESSIONS_PAGE = 50
+# Поля сессии, которые нужны таблице
+HISTORY_FIELDS = ("date", "avg_reaction", "min_reaction", "std_deviation", "accuracy", "total_wrong")
+
+
 class BounceButton(QPushButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
@@ -41,6 +47,7 @@ class UserProfileWindow(QMainWindow):
         super().__init__()
         self.db = db
         self.user = user
+        self.sessions = []      # загруженные строки истории (курсор для «Показать ещё»)
         self.setWindowTitle(f"ReactionRPS - {user['username']}")
         self.setGeometry(100, 100, 900, 600)
         self.setStyleSheet(f"background-color: {styles.COLORS['bg_white']};")
@@ -277,6 +284,17 @@ class UserProfileWindow(QMainWindow):
         header.setStretchLastSection(True)
 
         history_layout.addWidget(self.table)
+
+        # Следующая страница истории
+        self.more_btn = QPushButton("Показать ещё")
+        self.more_btn.setCursor(Qt.PointingHandCursor)
+        self.more_btn.setFixedHeight(38)
+        self.more_btn.setStyleSheet(styles.BUTTON_SECONDARY)
+        self.more_btn.setFont(QFont("Segoe UI", 11))
+        self.more_btn.clicked.connect(self.load_more_sessions)
+        self.more_btn.hide()
+        history_layout.addWidget(self.more_btn, 0, Qt.AlignHCenter)
+
         main_layout.addWidget(history_card)
 
     def save_profile(self):
@@ -305,11 +323,27 @@ class UserProfileWindow(QMainWindow):
         QMessageBox.information(self, "Успех", "Профиль обновлен")
 
     def load_sessions(self):
-        sessions = self.db.get_user_sessions(self.user['id'])
-
-        self.table.setRowCount(len(sessions))
-
-        for row, session in enumerate(sessions):
+        sessions = self.db.get_sessions(self.user['id'], fields=HISTORY_FIELDS, limit=SESSIONS_PAGE)
+        self.sessions = []
+        self.table.clearSpans()
+        self.table.setRowCount(0)
+        self.fill_table(sessions)
+
+    def load_more_sessions(self):
+        if not self.sessions:
+            return
+        more = self.db.get_sessions(self.user['id'], fields=HISTORY_FIELDS,
+                                    limit=SESSIONS_PAGE, after=self.sessions[-1])
+        self.fill_table(more)
+
+    def fill_table(self, sessions):
+        """Дописывает страницу сессий в конец таблицы."""
+        self.more_btn.setVisible(len(sessions) == SESSIONS_PAGE)
+        start = len(self.sessions)
+        self.sessions.extend(sessions)
+        self.table.setRowCount(len(self.sessions))
+
+        for row, session in enumerate(sessions, start):
             # Дата
             date_str = session['date'][:16].replace('T', ' ')
             date_item = QTableWidgetItem(date_str)
@@ -366,7 +400,7 @@ class UserProfileWindow(QMainWindow):
             self.table.setItem(row, 5, wrong_item)
 
         # Если нет тренировок
-        if len(sessions) == 0:
+        if not self.sessions:
             self.table.setRowCount(1)
             empty_item = QTableWidgetItem("Пока нет тренировок. Начните первую!")
             empty_item.setTextAlignment(Qt.AlignCenter)
@@ -0,0 +1,13 @@
+from PySide6.QtGui import QImage, QPixmap
+
+
+def frame_to_pixmap(frame):
+    """
+    Оборачивает BGR-кадр OpenCV в QPixmap без конвертации цвета:
+    QImage читает буфер numpy напрямую в формате BGR888, единственная
+    копия — при создании QPixmap. Кадр должен быть уже нужного размера
+    (см. CameraCapture(display_size=...)).
+    """
+    h, w = frame.shape[:2]
+    qt_img = QImage(frame.data, w, h, frame.strides[0], QImage.Format_BGR888)
+    return QPixmap.fromImage(qt_img)